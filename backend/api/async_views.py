@@ -0,0 +1,133 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.http.response import HttpResponse, StreamingHttpResponse
+from rest_framework import exceptions
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from recipes.models import Ingredient
+from recipes.search import ingredient_index
+from recipes.shopping_list import download_rows
+from recipes.tags import tag_registry
+
+from .renderers import (CSVRenderer, FastJSONRenderer, PDFRenderer,
+                        PlainTextRenderer)
+from .serializers import IngredientSerializer, TagSerializer
+from .views import tag_list_response
+
+SHOPPING_LIST_RENDERERS = (PlainTextRenderer, CSVRenderer, PDFRenderer)
+
+
+def json_response(data, status=200):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        content_type='application/json', status=status
+    )
+
+
+def authenticators_for():
+    return [
+        authenticator()
+        for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ]
+
+
+def error_response(request, exc):
+    """Ответ с ошибкой в том же виде, что у DRF."""
+    response = json_response({'detail': exc.detail}, exc.status_code)
+    if isinstance(
+        exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+    ):
+        authenticators = authenticators_for()
+        header = (
+            authenticators[0].authenticate_header(request)
+            if authenticators else None
+        )
+        if header:
+            response['WWW-Authenticate'] = header
+        else:
+            response.status_code = 403
+    return response
+
+
+def api_view(view):
+    """Только безопасные методы; Http404 и ошибки DRF — JSON."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            if request.method not in SAFE_METHODS:
+                raise exceptions.MethodNotAllowed(request.method)
+            return await view(request, *args, **kwargs)
+        except Http404:
+            return error_response(request, exceptions.NotFound())
+        except exceptions.APIException as exc:
+            return error_response(request, exc)
+    return wrapper
+
+
+@api_view
+async def tag_list(request):
+    snapshot = await sync_to_async(tag_registry.get)()
+    return tag_list_response(request, snapshot)
+
+
+@api_view
+async def tag_detail(request, pk):
+    tags = (await sync_to_async(tag_registry.get)()).by_id
+    if pk not in tags:
+        raise Http404
+    return json_response(TagSerializer(tags[pk]).data)
+
+
+@api_view
+async def ingredient_list(request):
+    """Поиск по началу названия, затем по вхождению."""
+    name = request.GET.get('name')
+    if name:
+        return json_response(
+            await sync_to_async(ingredient_index.search)(name)
+        )
+    return json_response(await sync_to_async(list)(
+        Ingredient.objects.values('id', 'name', 'measurement_unit')
+    ))
+
+
+@api_view
+async def ingredient_detail(request, pk):
+    ingredient = await sync_to_async(
+        Ingredient.objects.filter(pk=pk).first
+    )()
+    if ingredient is None:
+        raise Http404
+    return json_response(IngredientSerializer(ingredient).data)
+
+
+@api_view
+async def download_shopping_cart(request):
+    """Список покупок в формате ?format=txt|csv|pdf.
+
+    Строки читаются из базы целиком до ответа: под ASGI в Django 3.2
+    потоковое содержимое перебирается в цикле событий, где обращаться
+    к базе нельзя. PDF собирается в отдельном потоке.
+    """
+    drf_request = Request(request, authenticators=authenticators_for())
+    renderer, _ = DefaultContentNegotiation().select_renderer(
+        drf_request, [renderer() for renderer in SHOPPING_LIST_RENDERERS]
+    )
+    user = await sync_to_async(lambda: drf_request.user)()
+    if not user.is_authenticated:
+        raise exceptions.NotAuthenticated
+    rows = await sync_to_async(list)(download_rows(user.id))
+    content = renderer.stream(rows)
+    if renderer.buffered:
+        content = await sync_to_async(list, thread_sensitive=False)(content)
+    response = StreamingHttpResponse(
+        content, content_type=renderer.content_type
+    )
+    result = f'shop_list.{renderer.format}'
+    response['Content-Disposition'] = f'attachment; filename={result}'
+    return response
@@ -0,0 +1,36 @@
+from hashlib import md5
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """Сильный ETag из частей, от которых зависит ответ."""
+    return '"{}"'.format(md5(':'.join(map(str, parts)).encode()).hexdigest())
+
+
+def set_validators(response, etag, last_modified=None):
+    """ETag и Last-Modified (timestamp) для ответа.
+
+    Флаги в ответе зависят от пользователя, поэтому ответ
+    различается по заголовку Authorization.
+    """
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def not_modified(request, etag, last_modified=None):
+    """Ответ 304, если у клиента актуальная версия, иначе None.
+
+    Проверяется до выборки и сериализации данных.
+    """
+    response = get_conditional_response(
+        request, etag=etag,
+        last_modified=None if last_modified is None else int(last_modified)
+    )
+    if response is None:
+        return None
+    return set_validators(response, etag, last_modified)
@@ -0,0 +1,112 @@
+from collections import defaultdict
+
+from recipes.models import AmountIngredient, Recipe
+from recipes.storage import content_storage
+from recipes.tags import tag_registry
+
+RECIPE_FIELDS = (
+    'id', 'name', 'image', 'image_status', 'image_renditions', 'text',
+    'cooking_time', 'author_id', 'author__username', 'author__email',
+    'author__first_name', 'author__last_name',
+)
+FAVORITE_FIELDS = ('id', 'name', 'image', 'image_renditions', 'cooking_time')
+
+
+def image_url(name, request):
+    """Как ImageField.to_representation у DRF."""
+    if not name:
+        return None
+    url = content_storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def thumbnails(renditions, request):
+    """Ссылки на уменьшенные копии изображения: ширина -> URL."""
+    return {
+        width: image_url(name, request)
+        for width, name in renditions.items()
+    }
+
+
+def recipes_data(recipe_ids, request):
+    """Рецепты в том же виде, что отдаёт RecipeSerializer: id -> данные.
+
+    Собирается из values() без полей и сериализаторов DRF: три запроса
+    на любое число рецептов, теги берутся из tag_registry. Флаги
+    пользователя — False, их подставляет RecipeListSerializer.
+    """
+    snapshot = tag_registry.get()
+    tags = defaultdict(list)
+    for recipe_id, tag_id in (
+        Recipe.tags.through.objects
+        .filter(recipe_id__in=recipe_ids)
+        .values_list('recipe_id', 'tag_id')
+    ):
+        if tag_id in snapshot.by_id:
+            tags[recipe_id].append(tag_id)
+    ingredients = defaultdict(list)
+    for recipe_id, ingredient_id, name, amount, unit in (
+        AmountIngredient.objects
+        .filter(recipe_id__in=recipe_ids)
+        .order_by('id')
+        .values_list(
+            'recipe_id', 'ingredients_id', 'ingredients__name', 'amount',
+            'ingredients__measurement_unit'
+        )
+    ):
+        ingredients[recipe_id].append({
+            'id': ingredient_id,
+            'name': name,
+            'amount': amount,
+            'measurement_unit': unit,
+        })
+    data = {}
+    for row in (
+        Recipe.objects
+        .filter(pk__in=recipe_ids)
+        .order_by()
+        .values_list(*RECIPE_FIELDS)
+    ):
+        (recipe_id, name, image, image_status, renditions, text,
+         cooking_time, author_id, username, email, first_name,
+         last_name) = row
+        data[recipe_id] = {
+            'id': recipe_id,
+            'tags': [
+                snapshot.data_by_id[tag_id] for tag_id in sorted(
+                    tags[recipe_id], key=snapshot.position.__getitem__
+                )
+            ],
+            'author': {
+                'id': author_id,
+                'username': username,
+                'email': email,
+                'first_name': first_name,
+                'last_name': last_name,
+                'is_subscribed': False,
+            },
+            'ingredients': ingredients[recipe_id],
+            'is_favorited': False,
+            'is_in_shopping_cart': False,
+            'name': name,
+            'image': image_url(image, request),
+            'image_status': image_status,
+            'thumbnails': thumbnails(renditions, request),
+            'text': text,
+            'cooking_time': cooking_time,
+        }
+    return data
+
+
+def favorite_data(row, request):
+    """Рецепт в том же виде, что отдаёт FavoriteSerializer.
+
+    row — словарь из values(*FAVORITE_FIELDS).
+    """
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'image': image_url(row['image'], request),
+        'thumbnails': thumbnails(row['image_renditions'], request),
+        'cooking_time': row['cooking_time'],
+    }
@@ -1,13 +1,19 @@
-from django_filters import CharFilter, FilterSet, ModelMultipleChoiceFilter
+from django_filters import CharFilter, FilterSet, MultipleChoiceFilter
 
-from recipes.models import Recipe, Tag
+from recipes.models import Recipe
+from recipes.search import search_recipes
+from recipes.tags import tag_choices, tag_registry
 
 
 class RecipeFilter(FilterSet):
-    tags = ModelMultipleChoiceFilter(
-        field_name='tags__slug',
-        queryset=Tag.objects.all(),
-        to_field_name='slug'
+    tags = MultipleChoiceFilter(
+        field_name='tags',
+        choices=tag_choices,
+        method='get_tags'
+    )
+    search = CharFilter(
+        method='get_search',
+        field_name='search'
     )
     is_favorited = CharFilter(
         method='get_favorite',
@@ -20,7 +26,23 @@ class RecipeFilter(FilterSet):
 
     class Meta:
         model = Recipe
-        fields = ('is_favorited', 'is_in_shopping_cart', 'author', 'tags')
+        fields = (
+            'is_favorited', 'is_in_shopping_cart', 'author', 'tags', 'search'
+        )
+
+    def get_tags(self, queryset, name, value):
+        """Слаги переводятся в id по справочнику тегов в памяти."""
+        if not value:
+            return queryset
+        return queryset.filter(
+            tags__in=tag_registry.ids_for_slugs(value)
+        ).distinct()
+
+    def get_search(self, queryset, name, value):
+        """Полнотекстовый поиск, результаты по убыванию релевантности."""
+        if not value:
+            return queryset
+        return search_recipes(queryset, value)
 
     def get_favorite(self, queryset, name, value):
         user = self.request.user
@@ -0,0 +1,444 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from math import ceil
+from urllib.parse import quote, urlsplit
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes import dataset
+from recipes.models import Recipe, Tag
+from users.models import CustomUser
+
+ENDPOINTS = (
+    # Имя, путь, нужен ли токен.
+    ('recipes', '/api/recipes/', False),
+    ('recipes_auth', '/api/recipes/', True),
+    ('recipes_favorited', '/api/recipes/?is_favorited=1', True),
+    ('recipes_in_cart', '/api/recipes/?is_in_shopping_cart=1', True),
+    ('recipes_by_tag', '/api/recipes/?tags={tag}', False),
+    ('recipes_by_author', '/api/recipes/?author={author}', False),
+    ('recipe', '/api/recipes/{recipe}/', True),
+    ('users', '/api/users/', True),
+    ('user', '/api/users/{author}/', True),
+    ('subscriptions', '/api/users/subscriptions/', True),
+    ('tags', '/api/tags/', False),
+    ('ingredients', '/api/ingredients/?name={ingredient}', False),
+    ('download_shopping_cart', '/api/recipes/download_shopping_cart/', True),
+)
+LOCAL_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark_api',
+    }
+}
+PREFIX = 'bench'
+SERVER_TIMEOUT = 30
+# Пауза медленного клиента между строками заголовков, с.
+SLOW_CLIENT_INTERVAL = 1
+# Разница меньше этой (мс) считается шумом даже сверх --tolerance.
+NOISE_MS = 1
+
+
+class Rollback(Exception):
+    """Откат всех созданных при замере данных."""
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    values = sorted(values)
+    return values[max(0, ceil(percent / 100 * len(values)) - 1)]
+
+
+def summary(latencies, queries, rate):
+    return {
+        'p50': percentile(latencies, 50) * 1000,
+        'p95': percentile(latencies, 95) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+        'queries': queries,
+        'rps': rate,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный замер API на синтетических данных: p50/p95/p99, '
+        'SQL-запросы на запрос и запросы в секунду по эндпоинтам. '
+        'Без --url, --gunicorn и --asgi запросы идут через тестовый '
+        'клиент, данные откатываются. С --baseline результат '
+        'сравнивается с сохранённым и регрессия завершает команду '
+        'ошибкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float, default=1,
+            help='Множитель размера набора данных (1 — 100 '
+                 'пользователей и 1000 рецептов).'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора данных.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на эндпоинт.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help='Запросов на прогрев перед замером.'
+        )
+        parser.add_argument(
+            '--endpoint', dest='endpoints', action='append',
+            choices=[name for name, _, _ in ENDPOINTS],
+            help='Эндпоинт для замера, по умолчанию все.'
+        )
+        parser.add_argument(
+            '--url',
+            help='Адрес запущенного сервера с той же базой данных.'
+        )
+        parser.add_argument(
+            '--gunicorn', action='store_true',
+            help='Запустить gunicorn с gunicorn.conf.py на свободном порту.'
+        )
+        parser.add_argument(
+            '--asgi', action='store_true',
+            help='То же с uvicorn-воркерами и асинхронными view '
+                 '(ASYNC_VIEWS=True).'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Воркеров gunicorn.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=16,
+            help='Одновременных запросов при нагрузке на сервер.'
+        )
+        parser.add_argument(
+            '--slow-clients', type=int, default=0,
+            help='Соединений, которые во время замера медленно передают '
+                 'заголовки запроса.'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='JSON-файл с базовыми результатами.'
+        )
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать результаты в --baseline вместо сравнения.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимое относительное ухудшение p95 и запросов '
+                 'в секунду.'
+        )
+
+    def handle(self, *args, **options):
+        if options['save_baseline'] and not options['baseline']:
+            raise CommandError('Для --save-baseline нужен --baseline.')
+        if options['asgi'] and options['url']:
+            raise CommandError('--asgi запускает свой сервер, без --url.')
+        if dataset.exists(PREFIX):
+            raise CommandError(
+                f'В базе остался набор {PREFIX} от прерванного замера: '
+                f'seed_dataset --prefix {PREFIX} --remove.'
+            )
+        endpoints = [
+            endpoint for endpoint in ENDPOINTS
+            if not options['endpoints'] or endpoint[0] in options['endpoints']
+        ]
+        sizes = dataset.sizes_for(options['scale'])
+        load = bool(options['url'] or options['gunicorn'] or options['asgi'])
+        meta = {
+            'mode': 'load' if load else 'client',
+            'scale': options['scale'],
+            'seed': options['seed'],
+            'requests': options['requests'],
+        }
+        if load:
+            meta['concurrency'] = options['concurrency']
+            if options['asgi']:
+                meta['server'] = 'asgi'
+            if options['slow_clients']:
+                meta['slow_clients'] = options['slow_clients']
+        baseline = None
+        if options['baseline'] and not options['save_baseline']:
+            baseline = self.read_baseline(options['baseline'], meta)
+        if load:
+            results = self.load(endpoints, sizes, options)
+        else:
+            results = self.client(endpoints, sizes, options)
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<24} p50 {result["p50"]:7.1f} мс  '
+                f'p95 {result["p95"]:7.1f} мс  '
+                f'p99 {result["p99"]:7.1f} мс  '
+                f'запросов {result["queries"]:5.1f}  '
+                f'{result["rps"]:8.1f} зап/с'
+            )
+        if baseline is not None:
+            self.compare(results, baseline, options['tolerance'])
+        elif options['save_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as file:
+                json.dump(
+                    {'meta': meta, 'endpoints': results}, file,
+                    ensure_ascii=False, indent=2, sort_keys=True
+                )
+            self.stdout.write(f'Базовые результаты: {options["baseline"]}.')
+
+    def client(self, endpoints, sizes, options):
+        """Запросы через тестовый клиент внутри откатываемой транзакции."""
+        try:
+            with override_settings(CACHES=LOCAL_CACHE), transaction.atomic():
+                dataset.create(PREFIX, options['seed'], **sizes)
+                values, token = self.sample()
+                results = {}
+                api_client = APIClient()
+                for name, path, auth in endpoints:
+                    headers = (
+                        {'HTTP_AUTHORIZATION': f'Token {token}'}
+                        if auth else {}
+                    )
+                    url = path.format(**values)
+                    for _ in range(options['warmup']):
+                        self.fetch(api_client, url, headers)
+                    latencies = []
+                    queries = 0
+                    for _ in range(options['requests']):
+                        connection.queries_log.clear()
+                        with CaptureQueriesContext(connection) as context:
+                            latencies.append(
+                                self.fetch(api_client, url, headers)
+                            )
+                        queries += len(context)
+                    results[name] = summary(
+                        latencies, queries / len(latencies),
+                        len(latencies) / sum(latencies)
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+        return results
+
+    def load(self, endpoints, sizes, options):
+        """Параллельные запросы к серверу; данные создаются в базе
+        и удаляются после замера.
+        """
+        dataset.create(PREFIX, options['seed'], **sizes)
+        try:
+            values, token = self.sample()
+            with self.server(options) as base_url, self.slow_clients(
+                base_url, options['slow_clients']
+            ):
+                return self.run_load(
+                    base_url, endpoints, values, token, options
+                )
+        finally:
+            dataset.remove(PREFIX)
+
+    def run_load(self, base_url, endpoints, values, token, options):
+        local = threading.local()
+
+        def fetch(url, headers):
+            session = getattr(local, 'session', None)
+            if session is None:
+                session = local.session = requests.Session()
+            started = time.perf_counter()
+            try:
+                response = session.get(
+                    url, headers=headers, timeout=SERVER_TIMEOUT
+                )
+            except requests.Timeout:
+                raise CommandError(
+                    f'{url}: нет ответа за {SERVER_TIMEOUT} с.'
+                )
+            if response.status_code != 200:
+                raise CommandError(f'{url}: {response.status_code}')
+            return time.perf_counter() - started
+
+        results = {}
+        api_client = APIClient()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            for name, path, auth in endpoints:
+                headers = {'Authorization': f'Token {token}'} if auth else {}
+                url = base_url + path.format(**values)
+                list(pool.map(
+                    lambda _: fetch(url, headers), range(options['warmup'])
+                ))
+                started = time.perf_counter()
+                latencies = list(pool.map(
+                    lambda _: fetch(url, headers), range(options['requests'])
+                ))
+                elapsed = time.perf_counter() - started
+                # Запросы к базе считаются тем же кодом в этом процессе:
+                # кэш и база у него общие с сервером, а Host тот же,
+                # чтобы совпали ключи кэша ответов.
+                connection.queries_log.clear()
+                with CaptureQueriesContext(connection) as context:
+                    self.fetch(api_client, path.format(**values), {
+                        'HTTP_HOST': urlsplit(base_url).netloc,
+                        **{
+                            f'HTTP_{key.upper()}': value
+                            for key, value in headers.items()
+                        },
+                    })
+                results[name] = summary(
+                    latencies, len(context), len(latencies) / elapsed
+                )
+        return results
+
+    @contextmanager
+    def server(self, options):
+        if options['url']:
+            yield options['url'].rstrip('/')
+            return
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn',
+                '--config', 'gunicorn.conf.py',
+                '--bind', f'127.0.0.1:{port}',
+                '--workers', str(options['workers']),
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'ASYNC_VIEWS': str(options['asgi'])}
+        )
+        base_url = f'http://127.0.0.1:{port}'
+        try:
+            self.wait_for(base_url, process)
+            yield base_url
+        finally:
+            process.terminate()
+            process.wait(SERVER_TIMEOUT)
+
+    @contextmanager
+    def slow_clients(self, base_url, count):
+        """count соединений, передающих заголовки по строке раз
+        в SLOW_CLIENT_INTERVAL: синхронный воркер ждёт такого клиента,
+        не обслуживая других. Закрытое сервером соединение
+        открывается заново.
+        """
+        parts = urlsplit(base_url)
+        address = (parts.hostname, parts.port or 80)
+        stop = threading.Event()
+
+        def hold():
+            while not stop.is_set():
+                try:
+                    with socket.create_connection(
+                        address, SERVER_TIMEOUT
+                    ) as client:
+                        client.sendall(
+                            f'GET /api/tags/ HTTP/1.1\r\n'
+                            f'Host: {parts.netloc}\r\n'.encode()
+                        )
+                        while not stop.wait(SLOW_CLIENT_INTERVAL):
+                            client.sendall(b'X-Slow: 1\r\n')
+                except OSError:
+                    stop.wait(SLOW_CLIENT_INTERVAL)
+
+        threads = [
+            threading.Thread(target=hold, daemon=True) for _ in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def wait_for(self, base_url, process):
+        deadline = time.monotonic() + SERVER_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError('gunicorn не запустился.')
+            try:
+                requests.get(f'{base_url}/api/tags/', timeout=1)
+            except requests.ConnectionError:
+                time.sleep(0.2)
+                continue
+            return
+        raise CommandError('gunicorn не ответил за отведённое время.')
+
+    def sample(self):
+        """Значения для путей эндпоинтов и токен пользователя."""
+        users = CustomUser.objects.filter(dataset.user_filter(PREFIX))
+        recipe = (
+            Recipe.objects.filter(author__in=users)
+            .order_by('-favorites_count', 'id').first()
+        )
+        tag = Tag.objects.filter(dataset.tag_filter(PREFIX)).first()
+        token, _ = Token.objects.get_or_create(user=users.order_by('id')[0])
+        return {
+            'author': recipe.author_id,
+            'recipe': recipe.id,
+            'tag': tag.slug,
+            'ingredient': quote(f'{PREFIX} ингр'),
+        }, token.key
+
+    def fetch(self, api_client, url, headers):
+        started = time.perf_counter()
+        response = api_client.get(url, **headers)
+        # Потоковые ответы выполняют запросы при чтении содержимого.
+        response.getvalue()
+        if response.status_code != 200:
+            raise CommandError(f'{url}: {response.status_code}')
+        return time.perf_counter() - started
+
+    def read_baseline(self, path, meta):
+        try:
+            with open(path, encoding='utf-8') as file:
+                baseline = json.load(file)
+        except FileNotFoundError:
+            raise CommandError(f'Нет базовых результатов: {path}.')
+        if baseline['meta'] != meta:
+            raise CommandError(
+                f'Базовые результаты сняты с другими параметрами: '
+                f'{baseline["meta"]}.'
+            )
+        return baseline
+
+    def compare(self, results, baseline, tolerance):
+        regressions = []
+        for name, current in results.items():
+            previous = baseline['endpoints'].get(name)
+            if previous is None:
+                continue
+            if current['queries'] > previous['queries'] + 0.5:
+                regressions.append(
+                    f'{name}: запросов {previous["queries"]:.1f} -> '
+                    f'{current["queries"]:.1f}'
+                )
+            if current['p95'] > previous['p95'] * (1 + tolerance) + NOISE_MS:
+                regressions.append(
+                    f'{name}: p95 {previous["p95"]:.1f} -> '
+                    f'{current["p95"]:.1f} мс'
+                )
+            slower = 1000 / current['rps'] - 1000 / previous['rps']
+            if (current['rps'] < previous['rps'] * (1 - tolerance)
+                    and slower > NOISE_MS):
+                regressions.append(
+                    f'{name}: {previous["rps"]:.1f} -> '
+                    f'{current["rps"]:.1f} зап/с'
+                )
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(regression))
+        if regressions:
+            raise CommandError(f'Регрессий: {len(regressions)}.')
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
@@ -0,0 +1,131 @@
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.feed import recipes_data
+from api.renderers import FastJSONRenderer
+from api.serializers import RecipeSerializer
+from recipes.models import AmountIngredient, Ingredient, Recipe, Tag
+from users.models import CustomUser
+
+
+class Rollback(Exception):
+    """Откат всех созданных при замере данных."""
+
+
+class Command(BaseCommand):
+    help = (
+        'Замер сериализации страницы рецептов: RecipeSerializer и '
+        'JSONRenderer против api.feed и FastJSONRenderer.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=100,
+            help='Рецептов на странице.'
+        )
+        parser.add_argument(
+            '--ingredients', type=int, default=8,
+            help='Ингредиентов в рецепте.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Количество повторов.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(**options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, limit, ingredients):
+        author = CustomUser.objects.create(
+            username='benchmark', email='benchmark@foodgram.local',
+            first_name='benchmark', last_name='benchmark'
+        )
+        tags = [
+            Tag.objects.create(
+                name=f'benchmark {number}', color=f'#BEBE0{number}',
+                slug=f'benchmark-{number}'
+            ) for number in range(3)
+        ]
+        Ingredient.objects.bulk_create([
+            Ingredient(name=f'benchmark {number}', measurement_unit='г')
+            for number in range(ingredients)
+        ])
+        ingredient_ids = list(
+            Ingredient.objects
+            .filter(name__startswith='benchmark ')
+            .values_list('id', flat=True)
+        )
+        Recipe.objects.bulk_create([
+            Recipe(
+                author=author, name=f'benchmark {number}',
+                text='Описание рецепта ' * 20, cooking_time=10,
+                image='recipes/benchmark.jpg'
+            ) for number in range(limit)
+        ])
+        recipe_ids = list(
+            Recipe.objects
+            .filter(author=author)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag.id)
+            for recipe_id in recipe_ids for tag in tags[:2]
+        ])
+        AmountIngredient.objects.bulk_create([
+            AmountIngredient(
+                recipe_id=recipe_id, ingredients_id=ingredient_id, amount=1
+            )
+            for recipe_id in recipe_ids for ingredient_id in ingredient_ids
+        ])
+        return recipe_ids
+
+    def measure(self, repeat, limit, render):
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            content = render()
+            times.append(time.perf_counter() - started)
+        return content, limit / statistics.median(times)
+
+    def run(self, limit, ingredients, repeat, **options):
+        recipe_ids = self.seed(limit, ingredients)
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = AnonymousUser()
+        context = {'request': request}
+
+        def serializers():
+            recipes = Recipe.objects.for_feed().filter(pk__in=recipe_ids)
+            return JSONRenderer().render([
+                RecipeSerializer(recipe, context=context).data
+                for recipe in recipes.order_by('id')
+            ])
+
+        def fast():
+            data = recipes_data(recipe_ids, request)
+            return FastJSONRenderer().render(
+                [data[recipe_id] for recipe_id in recipe_ids]
+            )
+
+        before, before_rate = self.measure(repeat, limit, serializers)
+        after, after_rate = self.measure(repeat, limit, fast)
+        if before != after:
+            raise CommandError('Ответы сериализаторов различаются.')
+        self.stdout.write(
+            f'limit={limit}, {ingredients} ингредиентов: '
+            f'RecipeSerializer {before_rate:.0f} рецептов/с, '
+            f'api.feed {after_rate:.0f} рецептов/с, '
+            f'ускорение {after_rate / before_rate:.1f}x.'
+        )
@@ -0,0 +1,65 @@
+import statistics
+import time
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from recipes.images import process_image
+
+
+def sample_image(width, height, image_format):
+    """Изображение с шумом и градиентом, похожее на фотографию по сжатию."""
+    noise = Image.effect_noise((width, height), 48).convert('RGB')
+    gradient = Image.linear_gradient('L').resize((width, height))
+    image = Image.merge('RGB', (
+        gradient,
+        noise.getchannel('G'),
+        gradient.transpose(Image.FLIP_LEFT_RIGHT),
+    ))
+    exif = Image.Exif()
+    exif[0x0112] = 1
+    exif[0x010F] = 'benchmark'
+    buffer = BytesIO()
+    image.save(buffer, image_format, exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Замер процессорного времени обработки изображения рецепта.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', default=['1200x800', '4000x3000'],
+            help='Размеры исходного изображения, ШИРИНАxВЫСОТА.'
+        )
+        parser.add_argument(
+            '--format', default='JPEG', choices=('JPEG', 'PNG'),
+            help='Формат исходного изображения.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Количество повторов для каждого размера.'
+        )
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            width, height = map(int, size.lower().split('x'))
+            content = sample_image(width, height, options['format'])
+            times = []
+            for _ in range(options['repeat']):
+                started = time.process_time()
+                result = process_image(
+                    ContentFile(content, name=f'benchmark.{options["format"]}')
+                )
+                times.append((time.process_time() - started) * 1000)
+            renditions = sum(map(len, result.renditions.values()))
+            self.stdout.write(
+                f'{size} {options["format"]}: '
+                f'{statistics.median(times):.1f} мс CPU, '
+                f'исходный файл {len(content) // 1024} КБ, '
+                f'основное изображение {result.size // 1024} КБ, '
+                f'копии {renditions // 1024} КБ '
+                f'({len(result.renditions)} шт.)'
+            )
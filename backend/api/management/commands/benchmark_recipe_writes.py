@@ -0,0 +1,112 @@
+import base64
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Tag
+from users.models import CustomUser
+
+IMAGE = 'data:image/gif;base64,' + base64.b64encode(bytes.fromhex(
+    '47494638396101000100800000000000ffffff21f9040100000000'
+    '2c00000000010001000002024401003b'
+)).decode()
+
+
+class Rollback(Exception):
+    """Откат всех созданных при замере данных."""
+
+
+class Command(BaseCommand):
+    help = 'Замер времени создания и редактирования рецепта.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[5, 50, 500],
+            help='Количество ингредиентов в рецепте.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=10,
+            help='Количество повторов для каждого размера.'
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                try:
+                    with transaction.atomic():
+                        self.run(options['sizes'], options['repeat'])
+                        raise Rollback
+                except Rollback:
+                    pass
+
+    def request(self, method, *args):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = method(*args, format='json')
+            elapsed = time.perf_counter() - started
+        assert response.status_code in (200, 201), response.content
+        return response, elapsed * 1000, len(queries)
+
+    def run(self, sizes, repeat):
+        user = CustomUser.objects.create(
+            username='benchmark', email='benchmark@foodgram.local',
+            first_name='benchmark', last_name='benchmark'
+        )
+        tags = [
+            Tag.objects.create(
+                name=f'benchmark {number}', color=f'#BEBE0{number}',
+                slug=f'benchmark-{number}'
+            ) for number in range(3)
+        ]
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'benchmark {number}', measurement_unit='г')
+            for number in range(2 * max(sizes))
+        ])
+        ingredient_ids = list(
+            Ingredient.objects
+            .filter(name__startswith='benchmark ')
+            .values_list('id', flat=True)[:len(ingredients)]
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        for size in sizes:
+            create_times, edit_times = [], []
+            for number in range(repeat):
+                data = {
+                    'name': f'benchmark {size} {number}',
+                    'text': 'benchmark',
+                    'cooking_time': 10,
+                    'image': IMAGE,
+                    'tags': [tags[0].id, tags[1].id],
+                    'ingredients': [
+                        {'id': identifier, 'amount': 1}
+                        for identifier in ingredient_ids[:size]
+                    ],
+                }
+                response, elapsed, create_queries = self.request(
+                    client.post, '/api/recipes/', data
+                )
+                create_times.append(elapsed)
+                half = size // 2
+                data['tags'] = [tags[1].id, tags[2].id]
+                data['ingredients'] = [
+                    {'id': identifier, 'amount': 2}
+                    for identifier in ingredient_ids[half:size + half]
+                ]
+                _, elapsed, edit_queries = self.request(
+                    client.patch,
+                    f'/api/recipes/{response.data["id"]}/', data
+                )
+                edit_times.append(elapsed)
+            self.stdout.write(
+                f'{size} ингредиентов: '
+                f'создание {statistics.median(create_times):.1f} мс '
+                f'({create_queries} запросов), '
+                f'редактирование {statistics.median(edit_times):.1f} мс '
+                f'({edit_queries} запросов)'
+            )
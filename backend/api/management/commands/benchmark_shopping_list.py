@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.renderers import CSVRenderer, PDFRenderer, PlainTextRenderer
+
+RENDERERS = {
+    renderer.format: renderer
+    for renderer in (PlainTextRenderer, CSVRenderer, PDFRenderer)
+}
+
+
+class Command(BaseCommand):
+    help = 'Замер скорости выгрузки списка покупок в разных форматах.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=2000,
+            help='Количество строк в списке покупок.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Количество повторов для каждого формата.'
+        )
+        parser.add_argument(
+            '--format', dest='formats', action='append',
+            choices=sorted(RENDERERS),
+            help='Формат для замера, по умолчанию все.'
+        )
+
+    def handle(self, *args, **options):
+        rows = [
+            (f'Ингредиент {number}', 'г', number % 500 + 1)
+            for number in range(options['rows'])
+        ]
+        for file_format in options['formats'] or sorted(RENDERERS):
+            renderer = RENDERERS[file_format]()
+            size = 0
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                for chunk in renderer.stream(iter(rows)):
+                    size += len(chunk)
+            elapsed = time.perf_counter() - started
+            total = len(rows) * options['repeat']
+            self.stdout.write(
+                f'{file_format}: {total / elapsed:.0f} строк/с, '
+                f'{elapsed / options["repeat"] * 1000:.1f} мс на файл, '
+                f'{size // options["repeat"]} байт'
+            )
@@ -0,0 +1,194 @@
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import CustomUser
+
+ENDPOINTS = (
+    ('GET', '/api/recipes/'),
+    ('GET', '/api/recipes/?is_favorited=1'),
+    ('GET', '/api/recipes/?is_in_shopping_cart=1'),
+    ('GET', '/api/recipes/?author={author}'),
+    ('GET', '/api/recipes/?tags={tag}'),
+    ('GET', '/api/recipes/?search={word}'),
+    ('GET', '/api/recipes/{recipe}/'),
+    ('GET', '/api/users/'),
+    ('GET', '/api/users/{author}/'),
+    ('GET', '/api/users/subscriptions/'),
+    ('GET', '/api/recipes/download_shopping_cart/'),
+    ('POST', '/api/recipes/{recipe}/favorite/'),
+    ('DELETE', '/api/recipes/{recipe}/favorite/'),
+    ('POST', '/api/recipes/{recipe}/shopping_cart/'),
+    ('DELETE', '/api/recipes/{recipe}/shopping_cart/'),
+)
+NO_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+}
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+class Rollback(Exception):
+    """Откат изменений, сделанных запросами на запись."""
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN для запросов основных эндпоинтов. Завершается ошибкой, '
+        'если какой-то запрос читает большую таблицу целиком.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows', type=int, default=1000,
+            help='Полное чтение таблиц меньшего размера не считается '
+                 'ошибкой.'
+        )
+        parser.add_argument(
+            '--user',
+            help='Почта пользователя, от имени которого выполняются '
+                 'запросы. По умолчанию — с самым большим избранным.'
+        )
+        parser.add_argument(
+            '--allow', action='append', default=[],
+            help='Таблица, полное чтение которой допустимо.'
+        )
+        parser.add_argument(
+            '--verbose-plans', action='store_true',
+            help='Печатать планы всех запросов.'
+        )
+
+    def handle(self, *args, **options):
+        self.table_rows = {}
+        self.problems = 0
+        try:
+            with transaction.atomic(), override_settings(CACHES=NO_CACHE):
+                self.run(**options)
+                raise Rollback
+        except Rollback:
+            pass
+        if self.problems:
+            raise CommandError(
+                f'Полное чтение больших таблиц в {self.problems} запросах.'
+            )
+        self.stdout.write(self.style.SUCCESS('Планы запросов в порядке.'))
+
+    def sample(self, email):
+        users = CustomUser.objects.all()
+        if email:
+            users = users.filter(email=email)
+        user = users.annotate(
+            favorites=Count('favorite_recipes')
+        ).order_by('-favorites', 'id').first()
+        recipe = Recipe.objects.order_by('-id').first()
+        tag = Tag.objects.order_by('id').first()
+        if user is None or recipe is None or tag is None:
+            raise CommandError(
+                'Для проверки нужны пользователь, рецепт и тег.'
+            )
+        return user, {
+            'author': recipe.author_id,
+            'recipe': recipe.id,
+            'tag': tag.slug,
+            'word': recipe.name.split()[0],
+        }
+
+    def run(self, min_rows, user, allow, verbose_plans, **options):
+        user, values = self.sample(user)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        def request(method, path):
+            response = getattr(client, method.lower())(path)
+            # Потоковые ответы выполняют запросы при чтении содержимого.
+            response.getvalue()
+            return response.status_code
+
+        checks = [
+            (f'{method} {path.format(**values)}',
+             lambda method=method, path=path: request(
+                 method, path.format(**values)
+             ))
+            for method, path in ENDPOINTS
+        ]
+        checks.append((
+            'Поиск ингредиента по вхождению',
+            lambda: len(Ingredient.objects.filter(
+                name__icontains=values['word'][:3]
+            )[:20])
+        ))
+        for title, check in checks:
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as context:
+                result = check()
+            queries = [
+                query['sql'] for query in context.captured_queries
+                if query['sql'].lstrip().upper().startswith('SELECT')
+            ]
+            self.stdout.write(f'{title}: {result}, запросов {len(queries)}')
+            for sql in dict.fromkeys(queries):
+                plan, scans = self.explain(sql)
+                scans = [
+                    table for table in scans
+                    if table not in allow and self.rows(table) >= min_rows
+                ]
+                if scans:
+                    self.problems += 1
+                    self.stdout.write(self.style.ERROR(
+                        f'  полное чтение {", ".join(scans)}: {sql}'
+                    ))
+                if scans or verbose_plans:
+                    self.stdout.write(plan)
+
+    def explain(self, sql):
+        """Текст плана и таблицы, которые читаются целиком."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return (
+                    json.dumps(plan, ensure_ascii=False, indent=2),
+                    list(self.postgres_scans(plan[0]['Plan']))
+                )
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            details = [row[-1] for row in cursor.fetchall()]
+        plan = '\n'.join(f'    {detail}' for detail in details)
+        # В плане SQLite нет LIMIT; без сортировки чтение прервётся
+        # на первых строках, как и под Limit в PostgreSQL.
+        if ' LIMIT ' in sql and 'USE TEMP B-TREE' not in plan:
+            return plan, []
+        tables = set(connection.introspection.table_names())
+        scans = [
+            match.group(1) for match in map(SQLITE_SCAN.match, details)
+            if match and match.group(1) in tables
+        ]
+        return plan, scans
+
+    def postgres_scans(self, node, limited=False):
+        """Таблицы, читаемые целиком.
+
+        Seq Scan сразу под Limit останавливается на первых строках
+        и не считается.
+        """
+        if node['Node Type'] == 'Seq Scan' and not limited:
+            yield node['Relation Name']
+        for child in node.get('Plans', ()):
+            yield from self.postgres_scans(
+                child, limited=node['Node Type'] == 'Limit'
+            )
+
+    def rows(self, table):
+        if table not in self.table_rows:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+                )
+                self.table_rows[table] = cursor.fetchone()[0]
+        return self.table_rows[table]
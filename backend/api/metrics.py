@@ -0,0 +1,151 @@
+import threading
+import time
+from bisect import bisect_left
+from uuid import uuid4
+
+from django.core.cache import cache
+
+DURATION_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+HISTOGRAMS = {
+    'foodgram_request_duration_seconds': (
+        'Время обработки запроса.', DURATION_BUCKETS
+    ),
+    'foodgram_db_queries': ('Количество SQL-запросов.', QUERY_BUCKETS),
+    'foodgram_db_duration_seconds': (
+        'Время выполнения SQL-запросов.', DURATION_BUCKETS
+    ),
+    'foodgram_serialize_duration_seconds': (
+        'Время view и сериализаторов без SQL.', DURATION_BUCKETS
+    ),
+    'foodgram_render_duration_seconds': (
+        'Время рендеринга ответа.', DURATION_BUCKETS
+    ),
+}
+REPEATED_QUERIES = 'foodgram_repeated_queries_total'
+REPEATED_QUERIES_HELP = 'SQL-запросы, повторённые в запросе (вероятный N+1).'
+FLUSH_INTERVAL = 10
+PROCESS_TIMEOUT = 60 * 60
+PROCESSES_KEY = 'metrics:processes'
+PROCESS_KEY = 'metrics:process:{}'
+
+
+class Metrics:
+    """Гистограммы по view в памяти процесса.
+
+    Раз в FLUSH_INTERVAL секунд снимок пишется в кэш; /api/metrics/
+    складывает снимки всех процессов. Снимок умершего процесса
+    пропадает через PROCESS_TIMEOUT, Prometheus видит это как сброс
+    счётчиков.
+    """
+
+    def __init__(self):
+        self.key = PROCESS_KEY.format(uuid4().hex)
+        self.lock = threading.Lock()
+        # (имя, view) -> счётчики по корзинам, последняя +Inf, и сумма.
+        self.histograms = {}
+        self.counters = {}
+        self.flushed = time.monotonic()
+
+    def observe(self, view, values, repeated=0):
+        """values — словарь «имя гистограммы -> значение»."""
+        with self.lock:
+            for name, value in values.items():
+                buckets = HISTOGRAMS[name][1]
+                histogram = self.histograms.get((name, view))
+                if histogram is None:
+                    histogram = [0] * (len(buckets) + 1) + [0]
+                    self.histograms[(name, view)] = histogram
+                histogram[bisect_left(buckets, value)] += 1
+                histogram[-1] += value
+            if repeated:
+                key = (REPEATED_QUERIES, view)
+                self.counters[key] = self.counters.get(key, 0) + repeated
+            due = time.monotonic() - self.flushed >= FLUSH_INTERVAL
+            if due:
+                self.flushed = time.monotonic()
+        if due:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'histograms': {
+                    key: list(values)
+                    for key, values in self.histograms.items()
+                },
+                'counters': dict(self.counters),
+            }
+
+    def flush(self):
+        """Снимок процесса в кэш и отметка в списке процессов.
+
+        Список обновляется без блокировки: отметка, потерянная при
+        одновременной записи, восстановится при следующем сбросе.
+        """
+        cache.set(self.key, self.snapshot(), PROCESS_TIMEOUT)
+        now = time.time()
+        processes = {
+            key: seen
+            for key, seen in (cache.get(PROCESSES_KEY) or {}).items()
+            if now - seen < PROCESS_TIMEOUT
+        }
+        processes[self.key] = now
+        cache.set(PROCESSES_KEY, processes, None)
+
+    def collect(self):
+        """Сумма снимков всех процессов."""
+        self.flush()
+        processes = cache.get(PROCESSES_KEY) or {}
+        snapshots = [
+            snapshot for key, snapshot in cache.get_many(list(processes))
+            .items() if key != self.key
+        ]
+        snapshots.append(self.snapshot())
+        histograms = {}
+        counters = {}
+        for snapshot in snapshots:
+            for key, values in snapshot['histograms'].items():
+                total = histograms.setdefault(key, [0] * len(values))
+                for position, value in enumerate(values):
+                    total[position] += value
+            for key, value in snapshot['counters'].items():
+                counters[key] = counters.get(key, 0) + value
+        return histograms, counters
+
+
+def label(value):
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+def render_metrics(histograms, counters):
+    """Текстовый формат Prometheus."""
+    lines = []
+    for name, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (metric, view), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            view = label(view)
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), values[:-1]):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{view="{view}",le="{bound}"}} '
+                    f'{cumulative}'
+                )
+            lines.append(f'{name}_sum{{view="{view}"}} {values[-1]}')
+            lines.append(f'{name}_count{{view="{view}"}} {cumulative}')
+    lines.append(f'# HELP {REPEATED_QUERIES} {REPEATED_QUERIES_HELP}')
+    lines.append(f'# TYPE {REPEATED_QUERIES} counter')
+    for (_, view), value in sorted(counters.items()):
+        lines.append(f'{REPEATED_QUERIES}{{view="{label(view)}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
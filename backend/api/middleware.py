@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+current_tracker = ContextVar('current_tracker', default=None)
+
+
+def dispatch(execute, sql, params, many, context):
+    """execute_wrapper соединений: запрос учитывает трекер текущего
+    контекста. Контекст переходит в потоки sync_to_async, поэтому
+    учитываются и запросы асинхронных view.
+    """
+    tracker = current_tracker.get()
+    if tracker is None:
+        return execute(sql, params, many, context)
+    return tracker(execute, sql, params, many, context)
+
+
+def install(connection, **kwargs):
+    if dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch)
+
+
+connection_created.connect(install)
+
+
+class QueryTracker:
+    """Счётчик SQL-запросов для connection.execute_wrapper."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] = self.statements.get(sql, 0) + 1
+
+    @contextmanager
+    def track(self):
+        """Контекст, в котором учитываются запросы всех соединений."""
+        for connection in connections.all():
+            install(connection)
+        previous = current_tracker.get()
+        current_tracker.set(self)
+        try:
+            yield
+        finally:
+            # Не reset(): поток может закрываться в другом контексте.
+            current_tracker.set(previous)
+
+
+def view_name(request):
+    """RecipeViewSet.list, UserViewSet.subscriptions, admin:index и т. п."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name
+    method = request.method.lower()
+    actions = getattr(match.func, 'actions', None) or {}
+    return f'{view_class.__name__}.{actions.get(method, method)}'
+
+
+class QueryMetricsMiddleware:
+    """Количество и время SQL-запросов, время view и рендеринга по view.
+
+    SQL, повторённый в одном запросе QUERY_REPEAT_THRESHOLD и более раз,
+    пишется в лог как вероятный N+1. Для потоковых ответов учитываются
+    и запросы, выполненные при отдаче содержимого.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Как в MiddlewareMixin: Django будет ждать от __call__
+            # корутину, а отметки не уйдут в поток sync_to_async.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+            self.process_view = self.aprocess_view
+            self.process_template_response = (
+                self.aprocess_template_response
+            )
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+        tracker = self.start(request)
+        with tracker.track():
+            response = self.get_response(request)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        tracker = self.start(request)
+        with tracker.track():
+            response = await self.get_response(request)
+        return self.finish(request, response)
+
+    def start(self, request):
+        tracker = QueryTracker()
+        request._metrics = {
+            'started': time.perf_counter(), 'tracker': tracker
+        }
+        return tracker
+
+    def finish(self, request, response):
+        if response.streaming:
+            self.mark_render(request)
+            response.streaming_content = self.stream(
+                request, response.streaming_content
+            )
+        else:
+            self.record(request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics['view'] = time.perf_counter()
+
+    async def aprocess_view(self, request, view_func, view_args,
+                            view_kwargs):
+        request._metrics['view'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        self.mark_render(request)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        self.mark_render(request)
+        return response
+
+    def mark_render(self, request):
+        """Конец работы view: дальше рендеринг или отдача потока."""
+        marks = request._metrics
+        marks['render'] = time.perf_counter()
+        marks['view_db_time'] = marks['tracker'].db_time
+
+    def stream(self, request, content):
+        try:
+            with request._metrics['tracker'].track():
+                yield from content
+        finally:
+            self.record(request)
+
+    def record(self, request):
+        finished = time.perf_counter()
+        marks = request._metrics
+        tracker = marks['tracker']
+        view_started = marks.get('view', marks['started'])
+        render_started = marks.get('render', finished)
+        view_db_time = marks.get('view_db_time', tracker.db_time)
+        name = view_name(request)
+        repeated = 0
+        for sql, count in tracker.statements.items():
+            if count >= settings.QUERY_REPEAT_THRESHOLD:
+                repeated += 1
+                logger.warning(
+                    'N+1 в %s: %s одинаковых запросов: %s',
+                    name, count, sql[:300]
+                )
+        metrics.observe(name, {
+            'foodgram_request_duration_seconds': finished - marks['started'],
+            'foodgram_db_queries': tracker.queries,
+            'foodgram_db_duration_seconds': tracker.db_time,
+            'foodgram_serialize_duration_seconds': max(
+                render_started - view_started - view_db_time, 0
+            ),
+            'foodgram_render_duration_seconds': finished - render_started,
+        }, repeated)
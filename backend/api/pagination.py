@@ -1,6 +1,115 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
-class SixItemPagination(PageNumberPagination):
+COUNT_CACHE_KEY = 'count:{}'
+
+
+class ApproximateCountPaginator(Paginator):
+    """Paginator, не считающий точно большие выборки.
+
+    До APPROXIMATE_COUNT_THRESHOLD строк количество точное и считается
+    с LIMIT. Больше — оценка планировщика PostgreSQL (EXPLAIN), в
+    других СУБД — точное значение из кэша на COUNT_CACHE_TIMEOUT секунд.
+    """
+    count_is_approximate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list.order_by()
+        threshold = settings.APPROXIMATE_COUNT_THRESHOLD
+        exact = queryset.values('pk')[:threshold + 1].count()
+        if exact <= threshold:
+            return exact
+        self.count_is_approximate = True
+        if connections[queryset.db].vendor == 'postgresql':
+            return max(self.estimate(queryset), exact)
+        sql, params = queryset.query.sql_with_params()
+        key = COUNT_CACHE_KEY.format(
+            hashlib.md5(f'{sql}{params}'.encode()).hexdigest()
+        )
+        return cache.get_or_set(
+            key, queryset.count, settings.COUNT_CACHE_TIMEOUT
+        )
+
+    @staticmethod
+    def estimate(queryset):
+        """Оценка количества строк по плану запроса."""
+        sql, params = queryset.query.sql_with_params()
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class ApproximateCountPagination(PageNumberPagination):
+    django_paginator_class = ApproximateCountPaginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['count_is_approximate'] = (
+            self.page.paginator.count_is_approximate
+        )
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count_is_approximate'] = {'type': 'boolean'}
+        return schema
+
+
+class SixItemPagination(ApproximateCountPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+class SixItemCursorPagination(CursorPagination):
+    """Курсорная пагинация по убыванию id, без COUNT(*) и OFFSET."""
+    page_size = 6
+    page_size_query_param = 'limit'
+    ordering = '-id'
+
+
+class RecipePagination(SixItemPagination):
+    """Постраничная выдача рецептов.
+
+    Если в запросе есть параметр cursor (для первой страницы — пустой),
+    используется курсорная пагинация, иначе — по номеру страницы.
+    Курсор вместе с ?search= — ошибка 400: курсор упорядочивает по id,
+    а результаты поиска — по релевантности, поэтому поиск листается
+    только по номеру страницы.
+    """
+    search_query_param = 'search'
+
+    def __init__(self):
+        self.cursor_pagination = SixItemCursorPagination()
+        self.use_cursor = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = (
+            self.cursor_pagination.cursor_query_param in request.query_params
+        )
+        if self.use_cursor and request.query_params.get(
+            self.search_query_param
+        ):
+            raise ValidationError({
+                self.cursor_pagination.cursor_query_param:
+                    'Курсор нельзя использовать вместе с поиском, '
+                    'используйте номер страницы.'
+            })
+        if self.use_cursor:
+            return self.cursor_pagination.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.use_cursor:
+            return self.cursor_pagination.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,134 @@
+import csv
+from io import BytesIO
+
+import orjson
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+CHUNK_SIZE = 64 * 1024
+PDF_FONT = 'ShoppingListFont'
+PDF_FONT_SIZE = 12
+PDF_MARGIN = 50
+PDF_LINE_HEIGHT = 18
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class ShoppingListRenderer(BaseRenderer):
+    """Базовый рендерер списка покупок.
+
+    Строки списка отдаются генератором stream(), render() нужен только
+    для ответов с ошибками.
+    """
+    charset = 'utf-8'
+    # Первая часть готова только после обработки всех строк.
+    buffered = False
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data)
+
+    @property
+    def content_type(self):
+        if self.charset:
+            return f'{self.media_type}; charset={self.charset}'
+        return self.media_type
+
+    def stream(self, rows):
+        """Генератор содержимого файла по строкам
+        (название, единица измерения, количество).
+        """
+        raise NotImplementedError
+
+
+class PlainTextRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, rows):
+        for name, measurement_unit, amount in rows:
+            yield f'\n{name} - {amount} {measurement_unit}'
+
+
+class Echo:
+    """Файлоподобный объект, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def stream(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('Ингредиент', 'Количество', 'Единица'))
+        for name, measurement_unit, amount in rows:
+            yield writer.writerow((name, amount, measurement_unit))
+
+
+class PDFRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    buffered = True
+
+    @staticmethod
+    def register_font():
+        if PDF_FONT not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(
+                TTFont(PDF_FONT, settings.SHOPPING_LIST_FONT)
+            )
+
+    def stream(self, rows):
+        self.register_font()
+        buffer = BytesIO()
+        document = canvas.Canvas(buffer, pagesize=A4)
+        document.setTitle('Список покупок')
+        width, height = A4
+        top = height - PDF_MARGIN
+        document.setFont(PDF_FONT, PDF_FONT_SIZE + 4)
+        document.drawString(PDF_MARGIN, top, 'Список покупок')
+        document.setFont(PDF_FONT, PDF_FONT_SIZE)
+        y = top - 2 * PDF_LINE_HEIGHT
+        for name, measurement_unit, amount in rows:
+            if y < PDF_MARGIN:
+                document.showPage()
+                document.setFont(PDF_FONT, PDF_FONT_SIZE)
+                y = top
+            document.drawString(
+                PDF_MARGIN, y, f'• {name} - {amount} {measurement_unit}'
+            )
+            y -= PDF_LINE_HEIGHT
+        document.save()
+        buffer.seek(0)
+        yield from iter(lambda: buffer.read(CHUNK_SIZE), b'')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson.
+
+    Компактный вывод совпадает с JSONRenderer побайтно: даты и всё, что
+    orjson не умеет, сериализует тот же encoder_class, U+2028 и U+2029
+    экранируются так же. Вывод с отступами отдаётся JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if (not self.compact or self.ensure_ascii or self.get_indent(
+                accepted_media_type, renderer_context) is not None):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        content = orjson.dumps(
+            data, default=self.encoder_class().default,
+            option=ORJSON_OPTIONS
+        )
+        return content.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace('\u2029'.encode(), b'\\u2029')
@@ -1,11 +1,21 @@
+from django.db import models, transaction
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
+from recipes import shopping_list
+from recipes.cache import (get_fragments, get_versions, recipe_version,
+                           set_fragments)
+from recipes.image_jobs import enqueue
 from recipes.models import (AmountIngredient, FavoriteRecipe, Ingredient,
-                            Recipe, ShoppingCart, Tag, TagRecipe)
+                            Recipe, ShoppingCart, Tag)
+from recipes.search import defer_search_update, update_search_vector_on_commit
+from recipes.tags import TAGS_VERSION, tag_registry
+from recipes.user_state import user_state
 from users.models import CustomUser
 from users.serializers import UserSerializer
 
+from .feed import favorite_data, recipes_data, thumbnails
+
 MIN_AMOUNT = 1
 MAX_AMOUNT = 32000
 
@@ -40,6 +50,65 @@ class AmountIngredientSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'amount', 'measurement_unit']
 
 
+class RecipeListSerializer(serializers.ListSerializer):
+    """Список рецептов из кэша фрагментов.
+
+    Всё, кроме флагов пользователя, одинаково для всех и кэшируется
+    по рецепту и его версии. Для рецептов страницы достаточно id и
+    author_id: отсутствующие в кэше собирает api.feed.recipes_data.
+    Флаги пользователя загружаются для всей страницы и подставляются
+    во фрагменты.
+    """
+
+    def to_representation(self, data):
+        request = self.context.get('request')
+        recipes = list(
+            data.all() if isinstance(data, models.Manager) else data
+        )
+        if request is None:
+            return super().to_representation(recipes)
+        ids = [recipe.id for recipe in recipes]
+        state = user_state(request)
+        state.load_recipes(ids)
+        state.load_authors(recipe.author_id for recipe in recipes)
+        tags_version, *versions = get_versions(
+            TAGS_VERSION, *map(recipe_version, ids)
+        )
+        prefix = request.build_absolute_uri('/')
+        keys = {
+            recipe_id: f'recipe:{prefix}:{recipe_id}:{version}:{tags_version}'
+            for recipe_id, version in zip(ids, versions)
+        }
+        fragments = get_fragments(keys)
+        missing = [
+            recipe_id for recipe_id in ids if recipe_id not in fragments
+        ]
+        if missing:
+            fresh = recipes_data(missing, request)
+            set_fragments({
+                keys[recipe_id]: fragment
+                for recipe_id, fragment in fresh.items()
+            })
+            fragments.update(fresh)
+        return [
+            self.with_flags(fragments[recipe_id], state)
+            for recipe_id in ids if recipe_id in fragments
+        ]
+
+    @staticmethod
+    def with_flags(fragment, state):
+        fragment = dict(fragment)
+        fragment['is_favorited'] = state.is_favorited(fragment['id'])
+        fragment['is_in_shopping_cart'] = state.is_in_shopping_cart(
+            fragment['id']
+        )
+        fragment['author'] = dict(
+            fragment['author'],
+            is_subscribed=state.is_subscribed(fragment['author']['id'])
+        )
+        return fragment
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     """Сериализатор просмотра модели Recipe."""
 
@@ -51,6 +120,7 @@ class RecipeSerializer(serializers.ModelSerializer):
     is_in_shopping_cart = serializers.SerializerMethodField(
         method_name='get_is_in_shopping_cart')
     image = Base64ImageField()
+    thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -63,38 +133,45 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_status',
+            'thumbnails',
             'text',
             'cooking_time'
         ]
+        list_serializer_class = RecipeListSerializer
 
     def get_amount(self, obj):
         return None
 
+    def get_thumbnails(self, obj):
+        return thumbnails(obj.image_renditions, self.context.get('request'))
+
     def get_is_favorited(self, obj):
         """Находится ли рецепт в избранном."""
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
-        return FavoriteRecipe.objects.filter(
-            user=request.user, recipe_id=obj
-        ).exists()
+        return user_state(request).is_favorited(obj.id)
 
     def get_is_in_shopping_cart(self, obj):
         """Находится ли рецепт в списке покупок."""
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
-        return ShoppingCart.objects.filter(
-            user=request.user, recipe_id=obj
-        ).exists()
+        return user_state(request).is_in_shopping_cart(obj.id)
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
     """Сериализатор для отображения избранных рецептов."""
 
+    thumbnails = serializers.SerializerMethodField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'thumbnails', 'cooking_time')
+
+    def get_thumbnails(self, obj):
+        return thumbnails(obj.image_renditions, self.context.get('request'))
 
 
 class FavoriteCreateSerializer(serializers.ModelSerializer):
@@ -145,6 +222,10 @@ class SubscribeSerializer(UserSerializer):
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'recipes_preview'):
+            return [
+                favorite_data(row, request) for row in obj.recipes_preview
+            ]
         recipes = Recipe.objects.filter(author=obj)
         limit = request.query_params.get('recipes_limit')
         if limit:
@@ -157,11 +238,13 @@ class SubscribeSerializer(UserSerializer):
         user = self.context['request'].user
         if not user.is_authenticated:
             return False
-        return obj.subscriber.filter(user=user).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return user_state(self.context['request']).is_subscribed(obj.id)
 
     def get_recipes_count(self, obj):
         """Показывает количество рецептов автора."""
-        return Recipe.objects.filter(author=obj).count()
+        return obj.recipes_count
 
 
 class ShoppingCartCreateSerializer(serializers.ModelSerializer):
@@ -172,14 +255,24 @@ class ShoppingCartCreateSerializer(serializers.ModelSerializer):
         fields = ('user', 'recipe')
 
 
+class TagField(serializers.PrimaryKeyRelatedField):
+    """Тег по id из справочника тегов в памяти, без запроса к базе."""
+
+    def to_internal_value(self, data):
+        try:
+            return tag_registry.get().by_id[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
 class CreateRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор создания/обновления рецепта."""
 
     author = UserSerializer(read_only=True)
     ingredients = AddIngredientSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True
-    )
+    tags = TagField(queryset=Tag.objects.all(), many=True)
     image = Base64ImageField()
 
     class Meta:
@@ -197,7 +290,7 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         """Проверка количества ингредиентов и уникальности."""
-        ingredients = self.initial_data.get('ingredients')
+        ingredients = self.initial_data.get('ingredients', [])
         ingredients_set = set()
         for ingredient in ingredients:
             amount = ingredient['amount']
@@ -217,25 +310,73 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
             ingredients_set.add(identifier)
         return data
 
+    def validate_ingredients(self, ingredients):
+        """Проверка существования всех ингредиентов одним запросом."""
+        ids = [ingredient['id'] for ingredient in ingredients]
+        found = Ingredient.objects.only('id').in_bulk(ids)
+        missing = [identifier for identifier in ids if identifier not in found]
+        if missing:
+            raise serializers.ValidationError(
+                f'Ингредиенты не найдены: {missing}'
+            )
+        return ingredients
+
     def create_ingredients(self, ingredients, recipe):
         """Создание ингредиентов."""
         AmountIngredient.objects.bulk_create(
             [AmountIngredient(
-                ingredients=Ingredient.objects.get(id=ingredient['id']),
+                ingredients_id=ingredient['id'],
                 recipe=recipe,
                 amount=ingredient['amount']
             ) for ingredient in ingredients]
         )
 
-    def create_tags(self, tags, recipe):
-        """Создание тегов."""
-        TagRecipe.objects.bulk_create(
-            [TagRecipe(
-                tags=Tag.objects.get(name=tag_data),
-                recipe=recipe,
-            ) for tag_data in tags]
-        )
-
+    def update_ingredients(self, ingredients, recipe):
+        """Изменение только тех ингредиентов рецепта, что поменялись."""
+        new_amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        current = {
+            amount.ingredients_id: amount
+            for amount in AmountIngredient.objects.filter(recipe=recipe)
+        }
+        old_amounts = {
+            identifier: amount.amount or 0
+            for identifier, amount in current.items()
+        }
+        removed = [
+            amount.id for identifier, amount in current.items()
+            if identifier not in new_amounts
+        ]
+        if removed:
+            AmountIngredient.objects.filter(id__in=removed).delete()
+        changed = []
+        for identifier, amount in current.items():
+            if (identifier in new_amounts
+                    and amount.amount != new_amounts[identifier]):
+                amount.amount = new_amounts[identifier]
+                changed.append(amount)
+        if changed:
+            AmountIngredient.objects.bulk_update(changed, ['amount'])
+        added = [
+            ingredient for ingredient in ingredients
+            if ingredient['id'] not in current
+        ]
+        if added:
+            self.create_ingredients(added, recipe)
+        shopping_list.change_recipe(recipe.id, old_amounts, new_amounts)
+
+    def update_tags(self, tags, recipe):
+        """Добавление новых и удаление снятых тегов рецепта."""
+        current = set(recipe.tags.values_list('id', flat=True))
+        new = {tag.id for tag in tags}
+        if current - new:
+            recipe.tags.remove(*(current - new))
+        if new - current:
+            recipe.tags.add(*(new - current))
+
+    @transaction.atomic
     def create(self, validated_data):
         """Создание рецепта.
         Доступно только авторизированному пользователю.
@@ -243,13 +384,18 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         author = self.context.get('request').user
-        recipe = Recipe.objects.create(author=author, **validated_data)
-        self.create_ingredients(ingredients, recipe)
-        recipe.tags.add(*tags)
+        with defer_search_update():
+            recipe = Recipe.objects.create(author=author, **validated_data)
+            self.create_ingredients(ingredients, recipe)
+            recipe.tags.add(*tags)
+        update_search_vector_on_commit(recipe.pk)
+        enqueue(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Обновление рецепта. Доступно только автору"""
+        image = instance.image.name
         instance.image = validated_data.get('image', instance.image)
         instance.name = validated_data.get('name', instance.name)
         instance.text = validated_data.get('text', instance.text)
@@ -257,18 +403,24 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
             'cooking_time', instance.cooking_time
         )
 
-        instance.tags.clear()
-        tags = validated_data.get('tags')
-        self.create_tags(tags, instance)
+        with defer_search_update():
+            tags = validated_data.get('tags')
+            if tags is not None:
+                self.update_tags(tags, instance)
 
-        AmountIngredient.objects.filter(recipe=instance).all().delete()
-        ingredients = validated_data.get('ingredients')
-        self.create_ingredients(ingredients, instance)
+            ingredients = validated_data.get('ingredients')
+            if ingredients is not None:
+                self.update_ingredients(ingredients, instance)
 
-        instance.save()
+            instance.save()
+        update_search_vector_on_commit(instance.pk)
+        if instance.image.name != image:
+            enqueue(instance)
         return instance
 
     def to_representation(self, instance):
+        request = self.context.get('request')
+        instance = Recipe.objects.for_feed().get(pk=instance.pk)
         return RecipeSerializer(instance, context={
-            'request': self.context.get('request')
+            'request': request
         }).data
@@ -0,0 +1,117 @@
+import base64
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import (AmountIngredient, FavoriteRecipe, Ingredient,
+                            Recipe, ShoppingCart, Subscribe, Tag)
+from users.models import CustomUser
+
+# Размер и время жизни — как в настройках, хранилище — в памяти процесса.
+LOCAL_CACHE = {
+    'default': {
+        **settings.CACHES['default'],
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests',
+    }
+}
+GIF = 'data:image/gif;base64,' + base64.b64encode(bytes.fromhex(
+    '47494638396101000100800000000000ffffff21f90401000000002c000000000100'
+    '01000002024401003b'
+)).decode()
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class FoodgramTestCase(TestCase):
+    """Рецепты, теги, ингредиенты, избранное, корзина и подписки.
+
+    У reader избранным и в корзине отмечена часть рецептов, он подписан
+    на всех остальных авторов.
+    """
+    recipes_count = 120
+    authors_count = 10
+    ingredients_per_recipe = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = CustomUser.objects.create(
+            username='reader', email='reader@example.com',
+            first_name='Читатель', last_name='Тестовый'
+        )
+        CustomUser.objects.bulk_create([
+            CustomUser(
+                username=f'author{number}',
+                email=f'author{number}@example.com',
+                first_name='Автор', last_name=str(number)
+            )
+            for number in range(cls.authors_count)
+        ])
+        cls.authors = list(
+            CustomUser.objects.exclude(pk=cls.reader.pk).order_by('id')
+        )
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', color=f'#00000{number}',
+                slug=f'tag{number}'
+            )
+            for number in range(3)
+        ]
+        Ingredient.objects.bulk_create([
+            Ingredient(name=f'Ингредиент {number}', measurement_unit='г')
+            for number in range(50)
+        ])
+        cls.ingredients = list(Ingredient.objects.order_by('id'))
+        cls.recipes = []
+        for number in range(cls.recipes_count):
+            recipe = Recipe.objects.create(
+                author=cls.authors[number % len(cls.authors)],
+                name=f'Рецепт {number}', text='Описание',
+                cooking_time=5, image='recipes/test.gif'
+            )
+            recipe.tags.add(cls.tags[number % len(cls.tags)])
+            AmountIngredient.objects.bulk_create([
+                AmountIngredient(
+                    recipe=recipe,
+                    ingredients=cls.ingredients[
+                        (number + shift) % len(cls.ingredients)
+                    ],
+                    amount=shift + 1
+                )
+                for shift in range(cls.ingredients_per_recipe)
+            ])
+            if number % 2:
+                FavoriteRecipe.objects.create(user=cls.reader, recipe=recipe)
+            if number % 3 == 0:
+                ShoppingCart.objects.create(user=cls.reader, recipe=recipe)
+            cls.recipes.append(recipe)
+        for author in cls.authors[1:]:
+            Subscribe.objects.create(user=cls.reader, author=author)
+        cls.token = Token.objects.create(user=cls.reader)
+
+    def setUp(self):
+        cache.clear()
+        self.anonymous = APIClient()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+
+class MediaTestCase(FoodgramTestCase):
+    """Загруженные файлы сохраняются во временный MEDIA_ROOT."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
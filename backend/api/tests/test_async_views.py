@@ -0,0 +1,127 @@
+from contextlib import contextmanager
+from importlib import reload
+
+from asgiref.sync import async_to_sync
+from django.test import override_settings
+from django.urls import clear_url_caches, resolve
+
+import api.urls
+import foodgram.urls
+from api import async_views
+
+from .base import FoodgramTestCase
+
+DOWNLOAD_URL = '/api/recipes/download_shopping_cart/'
+
+
+def reload_urls():
+    reload(api.urls)
+    reload(foodgram.urls)
+    clear_url_caches()
+
+
+@contextmanager
+def async_urls():
+    """URLconf с ASYNC_VIEWS=True, как при запуске под uvicorn."""
+    setting = override_settings(ASYNC_VIEWS=True)
+    setting.enable()
+    reload_urls()
+    try:
+        yield
+    finally:
+        setting.disable()
+        reload_urls()
+
+
+def body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class AsyncViewTests(FoodgramTestCase):
+    """Асинхронные view под ASGI отвечают так же, как синхронные."""
+
+    def setUp(self):
+        super().setUp()
+        self.authorization = f'Token {self.token.key}'
+
+    def get_async(self, url, authorized=False):
+        headers = {'authorization': self.authorization} if authorized else {}
+        with async_urls():
+            return async_to_sync(self.async_client.get)(url, **headers)
+
+    def assert_same(self, url, authorized=False):
+        client = self.client if authorized else self.anonymous
+        expected = client.get(url)
+        response = self.get_async(url, authorized)
+        self.assertEqual(response.status_code, expected.status_code)
+        # Ошибку DRF рендерит выбранным рендерером файла, а асинхронный
+        # view всегда отдаёт её как JSON; тело одинаковое.
+        if response.status_code == 200:
+            self.assertEqual(
+                response['Content-Type'], expected['Content-Type']
+            )
+        self.assertEqual(body(response), body(expected))
+        return response
+
+    def test_routes_switch_with_setting(self):
+        with async_urls():
+            self.assertIs(resolve('/api/tags/').func, async_views.tag_list)
+            self.assertIs(
+                resolve(DOWNLOAD_URL).func,
+                async_views.download_shopping_cart
+            )
+        self.assertIsNot(resolve('/api/tags/').func, async_views.tag_list)
+
+    def test_tags_match_sync_views(self):
+        response = self.assert_same('/api/tags/')
+        self.assertEqual(
+            response['ETag'], self.anonymous.get('/api/tags/')['ETag']
+        )
+        self.assert_same(f'/api/tags/{self.tags[0].pk}/')
+
+    def test_ingredients_match_sync_views(self):
+        for url in (
+            '/api/ingredients/',
+            '/api/ingredients/?name=ингредиент 1',
+            f'/api/ingredients/{self.ingredients[0].pk}/',
+        ):
+            with self.subTest(url=url):
+                self.assert_same(url)
+
+    def test_download_matches_sync_view(self):
+        for file_format, content_type in (
+            ('txt', 'text/plain; charset=utf-8'),
+            ('csv', 'text/csv; charset=utf-8'),
+        ):
+            with self.subTest(file_format=file_format):
+                response = self.assert_same(
+                    f'{DOWNLOAD_URL}?format={file_format}', authorized=True
+                )
+                self.assertEqual(response['Content-Type'], content_type)
+                self.assertEqual(
+                    response['Content-Disposition'],
+                    f'attachment; filename=shop_list.{file_format}'
+                )
+
+    def test_download_pdf(self):
+        url = f'{DOWNLOAD_URL}?format=pdf'
+        expected = self.client.get(url)
+        response = self.get_async(url, authorized=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Content-Type'], expected['Content-Type'])
+        self.assertTrue(body(response).startswith(b'%PDF'))
+
+    def test_anonymous_download(self):
+        response = self.assert_same(DOWNLOAD_URL)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('WWW-Authenticate', response)
+
+    def test_unknown_pk(self):
+        for url in ('/api/tags/0/', '/api/ingredients/0/'):
+            with self.subTest(url=url):
+                response = self.assert_same(url)
+                self.assertEqual(response.status_code, 404)
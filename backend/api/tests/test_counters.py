@@ -0,0 +1,111 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count
+
+from recipes.models import Recipe
+from users.models import CustomUser
+
+from .base import GIF, MediaTestCase
+
+RECIPES_URL = '/api/recipes/'
+USERS_URL = '/api/users/'
+
+
+class CounterTests(MediaTestCase):
+    """Счётчики избранного, рецептов и подписчиков совпадают с
+    количеством строк после действий через API.
+    """
+
+    def assert_counters_match(self):
+        recipes = Recipe.objects.annotate(
+            actual=Count('favorite_recipe', distinct=True)
+        )
+        for recipe in recipes:
+            self.assertEqual(recipe.favorites_count, recipe.actual, recipe)
+        users = CustomUser.objects.annotate(
+            actual_recipes=Count('recipes', distinct=True),
+            actual_subscribers=Count('subscriber', distinct=True),
+        )
+        for user in users:
+            self.assertEqual(
+                (user.recipes_count, user.subscribers_count),
+                (user.actual_recipes, user.actual_subscribers),
+                user
+            )
+
+    def test_initial_counters(self):
+        self.assert_counters_match()
+
+    def test_favorite_and_unfavorite(self):
+        recipe = self.recipes[0]
+        url = f'{RECIPES_URL}{recipe.id}/favorite/'
+        for method, status, expected in (
+            ('post', 201, 1), ('post', 400, 1),
+            ('delete', 204, 0), ('delete', 404, 0),
+        ):
+            with self.subTest(method=method, status=status):
+                response = getattr(self.client, method)(url)
+                self.assertEqual(response.status_code, status)
+                recipe.refresh_from_db()
+                self.assertEqual(recipe.favorites_count, expected)
+        self.assert_counters_match()
+
+    def test_subscribe_and_unsubscribe(self):
+        author = self.authors[0]
+        url = f'{USERS_URL}{author.id}/subscribe/'
+        for method, status, expected in (
+            ('post', 201, 1), ('post', 400, 1),
+            ('delete', 204, 0), ('delete', 400, 0),
+        ):
+            with self.subTest(method=method, status=status):
+                response = getattr(self.client, method)(url)
+                self.assertEqual(response.status_code, status)
+                author.refresh_from_db()
+                self.assertEqual(author.subscribers_count, expected)
+        self.assert_counters_match()
+
+    def test_create_and_delete_recipe(self):
+        response = self.client.post(RECIPES_URL, {
+            'ingredients': [{'id': self.ingredients[0].id, 'amount': 1}],
+            'tags': [self.tags[0].id],
+            'name': 'Свой рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': GIF,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        recipe_id = response.data['id']
+        self.reader.refresh_from_db()
+        self.assertEqual(self.reader.recipes_count, 1)
+        self.client.post(f'{RECIPES_URL}{recipe_id}/favorite/')
+        self.assertEqual(
+            Recipe.objects.get(pk=recipe_id).favorites_count, 1
+        )
+        response = self.client.delete(f'{RECIPES_URL}{recipe_id}/')
+        self.assertEqual(response.status_code, 204)
+        self.reader.refresh_from_db()
+        self.assertEqual(self.reader.recipes_count, 0)
+        self.assert_counters_match()
+
+    def test_repair_counters(self):
+        Recipe.objects.filter(pk=self.recipes[1].pk).update(
+            favorites_count=100
+        )
+        Recipe.objects.filter(pk=self.recipes[2].pk).update(
+            favorites_count=7
+        )
+        CustomUser.objects.filter(pk=self.authors[1].pk).update(
+            recipes_count=0, subscribers_count=50
+        )
+        out = StringIO()
+        call_command('repair_counters', stdout=out)
+        self.assertIn('Счётчики пересчитаны.', out.getvalue())
+        self.assert_counters_match()
+        self.assertEqual(
+            Recipe.objects.get(pk=self.recipes[1].pk).favorites_count, 1
+        )
+        self.assertEqual(
+            CustomUser.objects.get(pk=self.authors[1].pk).subscribers_count,
+            1
+        )
@@ -0,0 +1,163 @@
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from recipes import dataset
+from recipes.models import (AmountIngredient, FavoriteRecipe, Ingredient,
+                            Recipe, ShoppingCart, Subscribe, Tag)
+from recipes.shopping_list import live_totals, stored_totals
+from users.models import CustomUser
+
+from .base import LOCAL_CACHE
+
+SIZES = {
+    'users': 20, 'recipes': 60, 'tags': 4, 'ingredients': 30,
+    'ingredients_per_recipe': 4, 'favorites': 5, 'cart': 3,
+    'subscriptions': 4,
+}
+
+
+def snapshot(prefix):
+    """Созданные строки набора без id и дат."""
+    users = CustomUser.objects.filter(dataset.user_filter(prefix))
+    return (
+        list(users.order_by('id').values_list('username', 'recipes_count')),
+        list(
+            Recipe.objects.filter(author__in=users).order_by('id')
+            .values_list('name', 'author__username', 'cooking_time')
+        ),
+        list(
+            FavoriteRecipe.objects.filter(user__in=users).order_by('id')
+            .values_list('user__username', 'recipe__name')
+        ),
+        list(
+            Subscribe.objects.filter(user__in=users).order_by('id')
+            .values_list('user__username', 'author__username')
+        ),
+    )
+
+
+class CopyFormatTests(TestCase):
+
+    def test_copy_value(self):
+        for value, expected in (
+            (None, '\\N'),
+            (True, 't'),
+            (False, 'f'),
+            (42, '42'),
+            ('a\tb\nc\\d\re', 'a\\tb\\nc\\\\d\\re'),
+            ({'240': 'x'}, '{"240": "x"}'),
+            (datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+             '2026-01-02T03:04:05+00:00'),
+        ):
+            with self.subTest(value=value):
+                self.assertEqual(dataset.copy_value(value), expected)
+
+    def test_copy_rows_fills_defaults_and_batches(self):
+        cursor = mock.MagicMock()
+        copied = []
+        cursor.__enter__.return_value.copy_expert.side_effect = (
+            lambda sql, buffer: copied.append((sql, buffer.read()))
+        )
+        with mock.patch.object(connection, 'cursor', return_value=cursor), \
+                mock.patch.object(dataset, 'COPY_BATCH_SIZE', 2):
+            dataset.copy_rows(
+                Tag, ('id', 'name', 'color', 'slug'),
+                ((number, f'тег\t{number}', '#000000', f's-{number}')
+                 for number in range(3))
+            )
+        self.assertEqual(len(copied), 2)
+        sql = copied[0][0]
+        self.assertTrue(sql.startswith(
+            'COPY "recipes_tag" ("id", "name", "color", "slug"'
+        ))
+        self.assertTrue(sql.endswith('FROM STDIN'))
+        rows = [
+            line.split('\t')
+            for _, content in copied for line in content.splitlines()
+        ]
+        self.assertEqual(
+            [row[:4] for row in rows],
+            [[str(number), f'тег\\t{number}', '#000000', f's-{number}']
+             for number in range(3)]
+        )
+        self.assertEqual({len(row) for row in rows}, {len(sql.split(','))})
+
+
+@override_settings(CACHES=LOCAL_CACHE)
+class DatasetTests(TestCase):
+
+    def test_same_seed_same_data(self):
+        dataset.create('first', seed=7, **SIZES)
+        dataset.create('second', seed=7, **SIZES)
+        first = snapshot('first')
+        self.assertEqual(len(first[1]), SIZES['recipes'])
+        self.assertEqual(
+            repr(first).replace('first', 'second'), repr(snapshot('second'))
+        )
+
+    def test_create_keeps_derived_data_consistent(self):
+        counts = dataset.create('seed', **SIZES)
+        users = CustomUser.objects.filter(dataset.user_filter('seed'))
+        self.assertEqual(counts['users'], users.count())
+        self.assertEqual(
+            counts['cart'], ShoppingCart.objects.filter(user__in=users).count()
+        )
+        for user in users:
+            self.assertEqual(stored_totals(user.id), live_totals(user.id))
+            self.assertEqual(user.recipes_count, user.recipes.count())
+
+    def test_remove_only_its_prefix(self):
+        dataset.create('seed', **SIZES)
+        dataset.create('seed-x', **SIZES)
+        dataset.remove('seed')
+        self.assertFalse(dataset.exists('seed'))
+        self.assertTrue(dataset.exists('seed-x'))
+        self.assertEqual(
+            Tag.objects.filter(dataset.tag_filter('seed-x')).count(),
+            SIZES['tags']
+        )
+        dataset.remove('seed-x')
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(AmountIngredient.objects.exists())
+        self.assertFalse(Ingredient.objects.exists())
+
+    def test_existing_prefix_is_command_error(self):
+        call_command(
+            'seed_dataset', '--scale', '0.05', '--prefix', 'seed',
+            stdout=StringIO()
+        )
+        with self.assertRaises(CommandError):
+            call_command(
+                'seed_dataset', '--scale', '0.05', '--prefix', 'seed',
+                stdout=StringIO()
+            )
+        call_command(
+            'seed_dataset', '--prefix', 'seed', '--remove', stdout=StringIO()
+        )
+        self.assertFalse(dataset.exists('seed'))
+
+    @skipUnless(
+        connection.vendor == 'postgresql', 'COPY есть только в PostgreSQL'
+    )
+    def test_copy(self):
+        """Данные пишутся через COPY, последовательности id сдвинуты."""
+        with mock.patch.object(
+            dataset, 'copy_rows', wraps=dataset.copy_rows
+        ) as copy_rows:
+            self.test_create_keeps_derived_data_consistent()
+        self.assertTrue(copy_rows.called)
+        author = CustomUser.objects.create(
+            username='author', email='author@example.com'
+        )
+        recipe = Recipe.objects.create(
+            author=author, name='После COPY', text='', cooking_time=1,
+            image='recipes/test.gif'
+        )
+        self.assertGreater(
+            recipe.id, Recipe.objects.exclude(pk=recipe.pk).latest('id').id
+        )
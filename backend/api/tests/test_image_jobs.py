@@ -0,0 +1,54 @@
+import os
+
+from recipes import image_jobs
+from recipes.images import render
+from recipes.models import ImageJob, Recipe
+
+from .base import GIF, MediaTestCase
+
+
+class ImageJobTests(MediaTestCase):
+    """Итог обработки изображения сразу виден в закэшированных ответах."""
+
+    def setUp(self):
+        super().setUp()
+        response = self.client.post('/api/recipes/', {
+            'ingredients': [{'id': self.ingredients[0].id, 'amount': 1}],
+            'tags': [self.tags[0].id],
+            'name': 'Рецепт с картинкой',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': GIF,
+        }, format='json')
+        self.url = f'/api/recipes/{response.data["id"]}/'
+
+    def cached_detail(self):
+        self.anonymous.get(self.url)
+        response = self.anonymous.get(self.url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        return response
+
+    def test_complete_invalidates_responses(self):
+        self.assertEqual(self.cached_detail().data['image_status'], 'pending')
+        job, = image_jobs.claim(1)
+        result = render(
+            image_jobs.read_source(job), os.path.basename(job.image)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            image_jobs.complete(job, *result)
+        response = self.anonymous.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['image_status'], Recipe.IMAGE_READY)
+        self.assertEqual(
+            ImageJob.objects.get(pk=job.pk).status, ImageJob.DONE
+        )
+
+    def test_final_failure_invalidates_responses(self):
+        self.cached_detail()
+        for _ in range(image_jobs.MAX_ATTEMPTS):
+            job, = image_jobs.claim(1)
+            with self.captureOnCommitCallbacks(execute=True):
+                image_jobs.fail(job, 'ошибка')
+        response = self.anonymous.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['image_status'], Recipe.IMAGE_FAILED)
@@ -0,0 +1,63 @@
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+from PIL import Image
+
+from recipes.images import MAX_IMAGE_SIZE, process_image
+
+
+def sample(size, image_format, **options):
+    buffer = BytesIO()
+    Image.linear_gradient('L').convert('RGB').resize(size).save(
+        buffer, image_format, **options
+    )
+    return buffer.getvalue()
+
+
+class ProcessImageTests(SimpleTestCase):
+
+    def process(self, content, name):
+        result = process_image(ContentFile(content, name=name))
+        return result.name, result.read()
+
+    def test_small_file_is_kept(self):
+        """Перекодированный JPEG больше исходного — остаётся исходный."""
+        content = sample((8, 8), 'PNG')
+        self.assertEqual(self.process(content, 'a.png'), ('a.png', content))
+
+    def test_larger_file_is_recompressed(self):
+        content = sample((400, 300), 'JPEG', quality=100)
+        name, processed = self.process(content, 'a.jpeg')
+        self.assertEqual(name, 'a.jpg')
+        self.assertLess(len(processed), len(content))
+
+    def test_oversized_image_is_reduced(self):
+        content = sample((MAX_IMAGE_SIZE + 400, 100), 'PNG')
+        name, processed = self.process(content, 'a.png')
+        self.assertEqual(name, 'a.jpg')
+        self.assertEqual(Image.open(BytesIO(processed)).width, MAX_IMAGE_SIZE)
+
+    def test_exif_is_stripped_without_recompression(self):
+        exif = Image.Exif()
+        exif[0x010E] = 'описание'
+        content = sample((8, 8), 'JPEG', exif=exif.tobytes())
+        name, processed = self.process(content, 'a.jpg')
+        self.assertEqual(name, 'a.jpg')
+        self.assertLess(len(processed), len(content))
+        self.assertFalse(Image.open(BytesIO(processed)).getexif())
+        self.assertEqual(
+            Image.open(BytesIO(processed)).tobytes(),
+            Image.open(BytesIO(content)).tobytes()
+        )
+
+    def test_rotated_image_is_recompressed(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        content = sample((8, 4), 'JPEG', exif=exif.tobytes())
+        name, processed = self.process(content, 'a.jpg')
+        self.assertEqual(Image.open(BytesIO(processed)).size, (4, 8))
+
+    def test_non_web_format_is_converted(self):
+        content = sample((8, 8), 'TIFF', compression='tiff_lzw')
+        self.assertEqual(self.process(content, 'a.tiff')[0], 'a.jpg')
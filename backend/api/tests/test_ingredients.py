@@ -0,0 +1,38 @@
+from recipes.search import IngredientIndex
+
+from .base import FoodgramTestCase
+
+
+class IngredientIndexTests(FoodgramTestCase):
+
+    def test_search_by_prefix_then_substring(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ingredients[0].name = 'Соль'
+            self.ingredients[0].save()
+            self.ingredients[1].name = 'Морская соль'
+            self.ingredients[1].save()
+        response = self.anonymous.get('/api/ingredients/', {'name': 'сол'})
+        self.assertEqual(
+            [item['name'] for item in response.data],
+            ['Соль', 'Морская соль']
+        )
+
+    def test_built_index_does_not_query_database(self):
+        index = IngredientIndex()
+        index.search('ингр')
+        with self.assertNumQueries(0):
+            self.assertEqual(len(index.search('ингр')), 20)
+
+    def test_change_reaches_other_processes(self):
+        """Индекс другого процесса перестраивается по версии в общем
+        кэше.
+        """
+        other = IngredientIndex()
+        self.assertEqual(other.search('икра'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ingredients[0].name = 'Икра'
+            self.ingredients[0].save()
+        self.assertEqual(
+            [item['id'] for item in other.search('икра')],
+            [self.ingredients[0].id]
+        )
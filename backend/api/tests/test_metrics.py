@@ -0,0 +1,148 @@
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api.metrics import REPEATED_QUERIES, metrics
+from api.middleware import (QueryMetricsMiddleware, QueryTracker,
+                            current_tracker, dispatch)
+from recipes.models import Tag
+
+from .base import FoodgramTestCase
+
+METRICS_URL = '/api/metrics/'
+RECIPES_URL = '/api/recipes/'
+
+
+class MetricsTestCase(FoodgramTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Счётчики процесса общие для всех тестов.
+        with metrics.lock:
+            metrics.histograms.clear()
+            metrics.counters.clear()
+
+    def get_metrics(self, **headers):
+        return self.anonymous.get(METRICS_URL, **headers)
+
+
+class MetricsAccessTests(MetricsTestCase):
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_required(self):
+        response = self.get_metrics(HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'}):
+            with self.subTest(headers=headers):
+                self.assertEqual(
+                    self.get_metrics(**headers).status_code, 403
+                )
+
+    @override_settings(METRICS_TOKEN='secret', DEBUG=True)
+    def test_token_required_with_debug(self):
+        self.assertEqual(self.get_metrics().status_code, 403)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_debug_only_without_token(self):
+        self.assertEqual(self.get_metrics().status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.get_metrics().status_code, 200)
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsRenderTests(MetricsTestCase):
+
+    def test_histogram_lines(self):
+        queries = 0
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(
+                    self.client.get(RECIPES_URL).status_code, 200
+                )
+            queries += len(captured)
+        lines = self.get_metrics(
+            HTTP_AUTHORIZATION='Bearer secret'
+        ).content.decode().splitlines()
+        view = 'view="RecipeViewSet.list"'
+        for line in (
+            '# TYPE foodgram_db_queries histogram',
+            f'foodgram_db_queries_bucket{{{view},le="+Inf"}} 2',
+            f'foodgram_db_queries_sum{{{view}}} {queries}',
+            f'foodgram_db_queries_count{{{view}}} 2',
+            f'foodgram_request_duration_seconds_count{{{view}}} 2',
+            f'foodgram_render_duration_seconds_count{{{view}}} 2',
+            f'# TYPE {REPEATED_QUERIES} counter',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, lines)
+        buckets = [
+            int(line.rsplit(' ', 1)[1]) for line in lines
+            if line.startswith(f'foodgram_db_queries_bucket{{{view}')
+        ]
+        self.assertEqual(buckets, sorted(buckets))
+
+    @override_settings(QUERY_REPEAT_THRESHOLD=5)
+    def test_repeated_queries_logged_and_counted(self):
+        def get_response(request):
+            for _ in range(5):
+                list(Tag.objects.filter(pk=self.tags[0].pk))
+            list(Tag.objects.all())
+            return HttpResponse()
+
+        middleware = QueryMetricsMiddleware(get_response)
+        with self.assertLogs('api.middleware', 'WARNING') as logs:
+            middleware(RequestFactory().get('/'))
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('N+1 в unresolved: 5', logs.output[0])
+        self.assertEqual(
+            metrics.counters[(REPEATED_QUERIES, 'unresolved')], 1
+        )
+        self.assertIn(
+            f'{REPEATED_QUERIES}{{view="unresolved"}} 1',
+            self.get_metrics(
+                HTTP_AUTHORIZATION='Bearer secret'
+            ).content.decode().splitlines()
+        )
+
+
+class ConnectionHookTests(FoodgramTestCase):
+
+    def test_queries_outside_tracker_not_counted(self):
+        tracker = QueryTracker()
+        with tracker.track():
+            list(Tag.objects.all())
+        list(Tag.objects.all())
+        self.assertEqual(tracker.queries, 1)
+        self.assertIsNone(current_tracker.get())
+        self.assertIn(dispatch, connection.execute_wrappers)
+
+    def test_nested_tracker_restores_outer(self):
+        outer = QueryTracker()
+        inner = QueryTracker()
+        with outer.track():
+            with inner.track():
+                list(Tag.objects.all())
+            self.assertIs(current_tracker.get(), outer)
+            list(Tag.objects.all())
+        self.assertEqual((outer.queries, inner.queries), (1, 1))
+
+    def test_new_connection_in_other_thread_is_tracked(self):
+        """Соединение потока sync_to_async получает хук при создании,
+        а трекер — из контекста вызывающего кода.
+        """
+        def query():
+            with connections['default'].cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return dispatch in connections['default'].execute_wrappers
+
+        tracker = QueryTracker()
+        with tracker.track():
+            installed = async_to_sync(
+                sync_to_async(query, thread_sensitive=False)
+            )()
+        self.assertTrue(installed)
+        self.assertEqual(tracker.queries, 1)
+        self.assertEqual(tracker.statements, {'SELECT 1': 1})
@@ -0,0 +1,64 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+from users.models import CustomUser
+
+BEFORE = [('recipes', '0004_tagrecipe')]
+AFTER = [('recipes', '0005_ingredient_unique')]
+
+
+class IngredientUniqueMigrationTests(TransactionTestCase):
+    """0005_ingredient_unique сливает дубликаты перед ограничением."""
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        super().tearDown()
+
+    def test_duplicates_are_merged(self):
+        apps = self.migrate(BEFORE)
+        ingredients = apps.get_model('recipes', 'Ingredient').objects
+        recipes = apps.get_model('recipes', 'Recipe').objects
+        amount_model = apps.get_model('recipes', 'AmountIngredient')
+        author = CustomUser.objects.create(
+            username='author', email='author@example.com'
+        )
+        salt, duplicate, other = [
+            ingredients.create(name=name, measurement_unit='г')
+            for name in ('соль', 'соль', 'перец')
+        ]
+        both, one = [
+            recipes.create(
+                author_id=author.id, name=name, text='', cooking_time=1,
+                image='recipes/test.gif'
+            )
+            for name in ('оба', 'один')
+        ]
+        amount_model.objects.bulk_create([
+            amount_model(recipe=both, ingredients=salt, amount=2),
+            amount_model(recipe=both, ingredients=duplicate, amount=3),
+            amount_model(recipe=one, ingredients=duplicate, amount=4),
+            amount_model(recipe=one, ingredients=other, amount=5),
+        ])
+
+        apps = self.migrate(AFTER)
+        ingredients = apps.get_model('recipes', 'Ingredient').objects
+        amount_model = apps.get_model('recipes', 'AmountIngredient')
+        self.assertEqual(
+            sorted(ingredients.values_list('id', flat=True)),
+            [salt.id, other.id]
+        )
+        self.assertEqual(
+            set(amount_model.objects.values_list(
+                'recipe_id', 'ingredients_id', 'amount'
+            )),
+            {(both.id, salt.id, 5), (one.id, salt.id, 4),
+             (one.id, other.id, 5)}
+        )
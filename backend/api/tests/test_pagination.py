@@ -0,0 +1,89 @@
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+
+from api.pagination import ApproximateCountPaginator
+from recipes.models import Recipe
+
+from .base import FoodgramTestCase
+
+RECIPES_URL = '/api/recipes/'
+
+
+class ApproximateCountTests(FoodgramTestCase):
+
+    def paginator(self):
+        return ApproximateCountPaginator(Recipe.objects.order_by('id'), 6)
+
+    def test_exact_below_threshold(self):
+        for threshold in (self.recipes_count, 10 * self.recipes_count):
+            with self.subTest(threshold=threshold):
+                with override_settings(
+                    APPROXIMATE_COUNT_THRESHOLD=threshold
+                ):
+                    paginator = self.paginator()
+                    with self.assertNumQueries(1):
+                        self.assertEqual(
+                            paginator.count, self.recipes_count
+                        )
+                    self.assertFalse(paginator.count_is_approximate)
+
+    @override_settings(APPROXIMATE_COUNT_THRESHOLD=50)
+    def test_estimate_above_threshold(self):
+        for estimate, expected in ((500, 500), (10, 51)):
+            with self.subTest(estimate=estimate):
+                paginator = self.paginator()
+                with mock.patch.object(connection, 'vendor', 'postgresql'), \
+                        mock.patch.object(
+                            ApproximateCountPaginator, 'estimate',
+                            return_value=estimate
+                        ) as estimate_mock:
+                    self.assertEqual(paginator.count, expected)
+                estimate_mock.assert_called_once()
+                self.assertTrue(paginator.count_is_approximate)
+
+    @skipUnless(
+        connection.vendor == 'postgresql', 'EXPLAIN (FORMAT JSON) есть '
+        'только в PostgreSQL'
+    )
+    @override_settings(APPROXIMATE_COUNT_THRESHOLD=50)
+    def test_planner_estimate(self):
+        paginator = self.paginator()
+        self.assertGreaterEqual(paginator.count, 51)
+        self.assertTrue(paginator.count_is_approximate)
+
+    @skipUnless(
+        connection.vendor != 'postgresql', 'В PostgreSQL — оценка по плану'
+    )
+    @override_settings(APPROXIMATE_COUNT_THRESHOLD=50)
+    def test_cached_count_above_threshold(self):
+        paginator = self.paginator()
+        with self.assertNumQueries(2):
+            self.assertEqual(paginator.count, self.recipes_count)
+        self.assertTrue(paginator.count_is_approximate)
+        Recipe.objects.filter(pk=self.recipes[0].pk).delete()
+        paginator = self.paginator()
+        # Полный COUNT(*) берётся из кэша, но значение всё равно
+        # помечено как приблизительное.
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, self.recipes_count)
+        self.assertTrue(paginator.count_is_approximate)
+
+    def test_response_flag(self):
+        for threshold, approximate in ((1000, False), (50, True)):
+            with self.subTest(threshold=threshold):
+                with override_settings(
+                    APPROXIMATE_COUNT_THRESHOLD=threshold
+                ), mock.patch.object(
+                    ApproximateCountPaginator, 'estimate',
+                    return_value=self.recipes_count
+                ):
+                    cache.clear()
+                    response = self.anonymous.get(RECIPES_URL, {'page': 2})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['count'], self.recipes_count)
+                self.assertIs(
+                    response.data['count_is_approximate'], approximate
+                )
@@ -0,0 +1,155 @@
+from django.core.cache import cache
+
+from recipes.cache import response_stats
+from recipes.models import FavoriteRecipe, ShoppingCart, Subscribe
+
+from .base import FoodgramTestCase
+
+LIST_URL = '/api/recipes/'
+
+
+class RecipeListTests(FoodgramTestCase):
+
+    def test_page_queries_do_not_depend_on_page_size(self):
+        """Страница 6 и limit=100 с холодным кэшем: одинаково запросов."""
+        for params, size in (('?page=6', 6), ('?limit=100', 100)):
+            for client, queries in ((self.client, 13), (self.anonymous, 6)):
+                with self.subTest(params=params, queries=queries):
+                    cache.clear()
+                    with self.assertNumQueries(queries):
+                        response = client.get(LIST_URL + params)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(len(response.data['results']), size)
+
+    def test_cached_fragments_skip_recipe_queries(self):
+        """Повторная страница собирается из фрагментов: без запросов
+        рецептов, тегов и ингредиентов.
+        """
+        self.client.get(LIST_URL + '?limit=100')
+        with self.assertNumQueries(9):
+            response = self.client.get(LIST_URL + '?limit=100')
+        self.assertEqual(len(response.data['results']), 100)
+
+    def test_user_flags_match_database(self):
+        response = self.client.get(LIST_URL + '?limit=100')
+        favorites = set(FavoriteRecipe.objects.filter(
+            user=self.reader
+        ).values_list('recipe_id', flat=True))
+        cart = set(ShoppingCart.objects.filter(
+            user=self.reader
+        ).values_list('recipe_id', flat=True))
+        followed = set(Subscribe.objects.filter(
+            user=self.reader
+        ).values_list('author_id', flat=True))
+        for recipe in response.data['results']:
+            self.assertEqual(
+                recipe['is_favorited'], recipe['id'] in favorites
+            )
+            self.assertEqual(
+                recipe['is_in_shopping_cart'], recipe['id'] in cart
+            )
+            self.assertEqual(
+                recipe['author']['is_subscribed'],
+                recipe['author']['id'] in followed
+            )
+
+    def test_flags_follow_changes_with_cached_fragments(self):
+        """Фрагменты рецептов общие, флаги пользователя — всегда свежие."""
+        recipe, author = self.recipes[0], self.authors[0]
+        self.client.get(LIST_URL + '?limit=100')
+        self.client.post(f'{LIST_URL}{recipe.id}/favorite/')
+        self.client.delete(f'{LIST_URL}{recipe.id}/shopping_cart/')
+        self.client.post(f'/api/users/{author.id}/subscribe/')
+        response = self.client.get(LIST_URL + '?limit=100')
+        data = next(
+            item for item in response.data['results']
+            if item['id'] == recipe.id
+        )
+        self.assertTrue(data['is_favorited'])
+        self.assertFalse(data['is_in_shopping_cart'])
+        self.assertTrue(data['author']['is_subscribed'])
+
+    def test_anonymous_flags_are_false(self):
+        response = self.anonymous.get(LIST_URL + '?limit=100')
+        for recipe in response.data['results']:
+            self.assertFalse(recipe['is_favorited'])
+            self.assertFalse(recipe['is_in_shopping_cart'])
+            self.assertFalse(recipe['author']['is_subscribed'])
+
+    def test_detail_queries(self):
+        url = f'{LIST_URL}{self.recipes[0].id}/'
+        for client, queries in ((self.client, 8), (self.anonymous, 4)):
+            with self.subTest(queries=queries):
+                cache.clear()
+                with self.assertNumQueries(queries):
+                    response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['ingredients']), 3)
+
+
+class ResponseCacheTests(FoodgramTestCase):
+
+    def test_repeated_page_is_hit(self):
+        """Повторная страница анонима отдаётся из кэша и после того, как
+        в кэш попали все остальные страницы и рецепты.
+        """
+        url = LIST_URL + '?limit=100'
+        response = self.anonymous.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        for page in range(1, self.recipes_count // 6 + 1):
+            self.anonymous.get(LIST_URL, {'page': page})
+        for recipe in self.recipes:
+            self.anonymous.get(f'{LIST_URL}{recipe.id}/')
+        hits, misses = response_stats()
+        with self.assertNumQueries(0):
+            response = self.anonymous.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response_stats(), (hits + 1, misses))
+        self.assertEqual(len(response.data['results']), 100)
+
+
+class CursorPaginationTests(FoodgramTestCase):
+
+    def test_cursor_with_search_is_rejected(self):
+        """Курсор упорядочивает по id и потерял бы порядок релевантности."""
+        response = self.anonymous.get(
+            LIST_URL, {'cursor': '', 'search': 'Рецепт'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.data)
+
+    def test_search_pages_by_number(self):
+        response = self.anonymous.get(
+            LIST_URL, {'search': 'Рецепт 1', 'page': 2}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('count', response.data)
+
+    def test_pages_cover_all_recipes_once(self):
+        seen = []
+        url = LIST_URL + '?cursor=&limit=50'
+        while url:
+            response = self.anonymous.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(recipe['id'] for recipe in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(
+            seen, sorted((recipe.id for recipe in self.recipes), reverse=True)
+        )
+
+
+class ConditionalRequestTests(FoodgramTestCase):
+
+    def test_unchanged_feed_is_not_modified(self):
+        response = self.client.get(LIST_URL)
+        etag = response['ETag']
+        response = self.client.get(LIST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_favorite_changes_etag(self):
+        etag = self.client.get(LIST_URL)['ETag']
+        recipe = self.recipes[0]
+        self.client.post(f'{LIST_URL}{recipe.id}/favorite/')
+        response = self.client.get(LIST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,66 @@
+import csv
+from io import StringIO
+
+from recipes.models import Ingredient
+from recipes.shopping_list import live_totals, rebuild, stored_totals
+
+from .base import FoodgramTestCase
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+class ShoppingListTests(FoodgramTestCase):
+    """Скачивание списка покупок — два запроса при любом размере корзины."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        rebuild(cls.reader.id)
+
+    def download(self, file_format, queries=2):
+        with self.assertNumQueries(queries):
+            response = self.client.get(URL, {'format': file_format})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                response['Content-Disposition'],
+                f'attachment; filename=shop_list.{file_format}'
+            )
+            return b''.join(response.streaming_content)
+
+    def expected(self):
+        names = dict(Ingredient.objects.values_list('id', 'name'))
+        return {
+            names[ingredient]: total
+            for ingredient, total in live_totals(self.reader.id).items()
+        }
+
+    def test_text(self):
+        lines = self.download('txt').decode().strip().split('\n')
+        totals = {}
+        for line in lines:
+            name, amount = line.split(' - ')
+            totals[name] = int(amount.split()[0])
+        self.assertEqual(totals, self.expected())
+
+    def test_csv(self):
+        rows = list(csv.reader(StringIO(self.download('csv').decode())))
+        self.assertEqual(rows[0], ['Ингредиент', 'Количество', 'Единица'])
+        self.assertEqual(
+            {name: int(amount) for name, amount, _ in rows[1:]},
+            self.expected()
+        )
+
+    def test_pdf(self):
+        self.assertTrue(self.download('pdf').startswith(b'%PDF'))
+
+    def test_cart_changes_keep_totals(self):
+        self.client.delete(f'/api/recipes/{self.recipes[0].id}/shopping_cart/')
+        self.client.post(f'/api/recipes/{self.recipes[1].id}/shopping_cart/')
+        self.assertEqual(
+            stored_totals(self.reader.id), live_totals(self.reader.id)
+        )
+        self.download('txt')
+
+    def test_anonymous(self):
+        response = self.anonymous.get(URL)
+        self.assertEqual(response.status_code, 401)
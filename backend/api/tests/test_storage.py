@@ -0,0 +1,41 @@
+import os
+import time
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+
+from recipes.storage import content_storage
+
+from .base import MediaTestCase
+
+DAY = 24 * 60 * 60
+
+
+class ContentAddressedStorageTests(MediaTestCase):
+
+    def age(self, name, seconds):
+        timestamp = time.time() - seconds
+        os.utime(content_storage.path(name), (timestamp, timestamp))
+
+    def test_same_content_is_stored_once(self):
+        first = content_storage.save('recipes/a.gif', ContentFile(b'gif'))
+        second = content_storage.save('recipes/b.GIF', ContentFile(b'gif'))
+        self.assertEqual(first, second)
+        self.assertTrue(first.endswith('.gif'))
+
+    def test_collect_keeps_reuploaded_file(self):
+        """Повторная загрузка старого неиспользуемого файла обновляет его
+        время изменения, и collect_images его не удаляет.
+        """
+        name = content_storage.save('recipes/a.gif', ContentFile(b'old'))
+        self.age(name, DAY)
+        content_storage.save('recipes/a.gif', ContentFile(b'old'))
+        call_command('collect_images', stdout=StringIO())
+        self.assertTrue(content_storage.exists(name))
+
+    def test_collect_removes_old_unreferenced_file(self):
+        name = content_storage.save('recipes/a.gif', ContentFile(b'old'))
+        self.age(name, DAY)
+        call_command('collect_images', stdout=StringIO())
+        self.assertFalse(content_storage.exists(name))
@@ -0,0 +1,70 @@
+from recipes.tags import TagRegistry
+
+from .base import FoodgramTestCase
+
+TAGS_URL = '/api/tags/'
+
+
+class TagRegistryTests(FoodgramTestCase):
+
+    def test_not_modified(self):
+        etag = self.anonymous.get(TAGS_URL)['ETag']
+        for header in (etag, f'"other", {etag}', '*'):
+            with self.subTest(header=header):
+                with self.assertNumQueries(0):
+                    response = self.anonymous.get(
+                        TAGS_URL, HTTP_IF_NONE_MATCH=header
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['ETag'], etag)
+        response = self.anonymous.get(TAGS_URL, HTTP_IF_NONE_MATCH='"old"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_save_changes_etag_and_content(self):
+        old = self.anonymous.get(TAGS_URL)
+        other = TagRegistry()
+        other.get()
+        tag = self.tags[0]
+        tag.name = 'Завтрак'
+        tag.save()
+        response = self.anonymous.get(
+            TAGS_URL, HTTP_IF_NONE_MATCH=old['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], old['ETag'])
+        self.assertIn(
+            {'id': tag.id, 'name': 'Завтрак', 'color': tag.color,
+             'slug': tag.slug},
+            response.json()
+        )
+        self.assertEqual(
+            self.anonymous.get(f'{TAGS_URL}{tag.id}/').data['name'],
+            'Завтрак'
+        )
+        # Справочник другого процесса перечитывается по версии в кэше.
+        self.assertEqual(other.get().by_id[tag.id].name, 'Завтрак')
+        self.assertEqual(other.get().etag, response['ETag'])
+
+    def test_delete_invalidates(self):
+        old = self.anonymous.get(TAGS_URL)
+        tag = self.tags[0]
+        tag.delete()
+        response = self.anonymous.get(
+            TAGS_URL, HTTP_IF_NONE_MATCH=old['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], old['ETag'])
+        self.assertNotIn(tag.id, [item['id'] for item in response.json()])
+        response = self.anonymous.get(f'{TAGS_URL}{tag.id}/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_retrieve(self):
+        tag = self.tags[1]
+        response = self.anonymous.get(f'{TAGS_URL}{tag.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['slug'], tag.slug)
+        for pk in ('abc', '0', '1.5'):
+            with self.subTest(pk=pk):
+                response = self.anonymous.get(f'{TAGS_URL}{pk}/')
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,121 @@
+from django.core.cache import cache
+
+from recipes.models import Recipe, Subscribe
+from users.models import CustomUser
+
+from .base import FoodgramTestCase
+
+USERS_URL = '/api/users/'
+SUBSCRIPTIONS_URL = USERS_URL + 'subscriptions/'
+
+
+class SubscriptionTests(FoodgramTestCase):
+
+    def follow_new_authors(self, count):
+        CustomUser.objects.bulk_create([
+            CustomUser(
+                username=f'new{number}', email=f'new{number}@example.com',
+                first_name='Новый', last_name=str(number)
+            )
+            for number in range(count)
+        ])
+        authors = CustomUser.objects.filter(username__startswith='new')
+        for author in authors:
+            Recipe.objects.create(
+                author=author, name=f'Рецепт {author.username}',
+                text='Описание', cooking_time=5, image='recipes/test.gif'
+            )
+            Subscribe.objects.create(user=self.reader, author=author)
+
+    def test_queries_do_not_depend_on_followed_authors(self):
+        for extra in (0, 30):
+            with self.subTest(extra=extra):
+                self.follow_new_authors(extra)
+                cache.clear()
+                with self.assertNumQueries(4):
+                    response = self.client.get(
+                        SUBSCRIPTIONS_URL + '?limit=100&recipes_limit=2'
+                    )
+                self.assertEqual(
+                    response.data['count'],
+                    Subscribe.objects.filter(user=self.reader).count()
+                )
+
+    def test_recipes_limit_and_count(self):
+        response = self.client.get(SUBSCRIPTIONS_URL + '?recipes_limit=2')
+        for author in response.data['results']:
+            recipes = Recipe.objects.filter(author_id=author['id'])
+            self.assertEqual(author['recipes_count'], recipes.count())
+            self.assertEqual(len(author['recipes']), 2)
+            self.assertTrue(author['is_subscribed'])
+
+
+class UserConditionalTests(FoodgramTestCase):
+
+    def get(self, user, **headers):
+        return self.client.get(f'{USERS_URL}{user.id}/', **headers)
+
+    def assert_etag_changes(self, user, change):
+        etag = self.get(user)['ETag']
+        response = self.get(user, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        change()
+        response = self.get(user, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(
+            self.get(user, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            304
+        )
+        return response
+
+    def test_not_modified(self):
+        author = self.authors[1]
+        response = self.get(author)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Authorization', response['Vary'])
+        with self.assertNumQueries(3):
+            response = self.get(author, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_anonymous_last_modified(self):
+        url = f'{USERS_URL}{self.authors[1].id}/'
+        last_modified = self.anonymous.get(url)['Last-Modified']
+        response = self.anonymous.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn('Last-Modified', self.get(self.authors[1]))
+
+    def test_profile_update_changes_etag(self):
+        author = self.authors[1]
+
+        def rename():
+            author.first_name = 'Переименованный'
+            author.save()
+
+        response = self.assert_etag_changes(author, rename)
+        self.assertEqual(response.data['first_name'], 'Переименованный')
+
+    def test_own_profile_update_changes_etag(self):
+        def patch():
+            response = self.client.patch(
+                f'{USERS_URL}{self.reader.id}/', {'last_name': 'Новый'}
+            )
+            self.assertEqual(response.status_code, 200, response.data)
+
+        response = self.assert_etag_changes(self.reader, patch)
+        self.assertEqual(response.data['last_name'], 'Новый')
+
+    def test_subscription_changes_etag(self):
+        author = self.authors[0]
+        url = f'{USERS_URL}{author.id}/subscribe/'
+        response = self.assert_etag_changes(
+            author, lambda: self.client.post(url)
+        )
+        self.assertTrue(response.data['is_subscribed'])
+        response = self.assert_etag_changes(
+            author, lambda: self.client.delete(url)
+        )
+        self.assertFalse(response.data['is_subscribed'])
@@ -0,0 +1,119 @@
+from unittest import mock
+
+from recipes.models import AmountIngredient, Ingredient
+from recipes.shopping_list import live_totals, stored_totals
+from recipes.tags import tag_registry
+
+from .base import GIF, MediaTestCase
+
+
+class RecipeWriteTests(MediaTestCase):
+    """Число запросов на запись не зависит от числа ингредиентов."""
+
+    def setUp(self):
+        super().setUp()
+        tag_registry.get()
+
+    def payload(self, count, amount=1, name='Рецепт'):
+        return {
+            'ingredients': [
+                {'id': ingredient.id, 'amount': amount}
+                for ingredient in self.ingredients[:count]
+            ],
+            'tags': [self.tags[0].id, self.tags[1].id],
+            'name': name,
+            'text': 'Описание',
+            'cooking_time': 10,
+        }
+
+    def create(self, count, name='Рецепт'):
+        response = self.client.post(
+            '/api/recipes/', {**self.payload(count, name=name), 'image': GIF},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['id']
+
+    def test_create_queries_do_not_depend_on_ingredients(self):
+        for count in (5, 40):
+            with self.assertNumQueries(17):
+                recipe_id = self.create(count, name=f'Рецепт {count}')
+            self.assertEqual(
+                AmountIngredient.objects.filter(recipe_id=recipe_id).count(),
+                count
+            )
+
+    def test_update_queries_do_not_depend_on_ingredients(self):
+        for count in (5, 40):
+            recipe_id = self.create(count, name=f'Рецепт {count}')
+            with self.assertNumQueries(19):
+                response = self.client.patch(
+                    f'/api/recipes/{recipe_id}/',
+                    self.payload(count, amount=2, name=f'Рецепт {count}'),
+                    format='json'
+                )
+            self.assertEqual(response.status_code, 200, response.data)
+
+    def test_update_changes_only_amounts(self):
+        recipe_id = self.create(40)
+        before = dict(AmountIngredient.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredients_id', 'id'))
+        response = self.client.patch(
+            f'/api/recipes/{recipe_id}/', self.payload(40, amount=2),
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        after = dict(AmountIngredient.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredients_id', 'id'))
+        self.assertEqual(before, after)
+
+    def test_update_keeps_shopping_lists_in_sync(self):
+        recipe_id = self.create(5)
+        self.client.post(f'/api/recipes/{recipe_id}/shopping_cart/')
+        self.client.patch(
+            f'/api/recipes/{recipe_id}/', self.payload(7, amount=4),
+            format='json'
+        )
+        self.assertEqual(
+            stored_totals(self.reader.id), live_totals(self.reader.id)
+        )
+
+    def test_unknown_ingredient_is_rejected(self):
+        recipe_id = self.create(3)
+        payload = self.payload(3)
+        payload['ingredients'].append({
+            'id': Ingredient.objects.order_by('-id')[0].id + 1, 'amount': 1
+        })
+        response = self.client.patch(
+            f'/api/recipes/{recipe_id}/', payload, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_vector_updated_once_after_commit(self):
+        """Запись через API пересчитывает вектор один раз после коммита,
+        а не на каждый сигнал рецепта и его ингредиентов.
+        """
+        with mock.patch('recipes.search.update_search_vector') as deferred, \
+                mock.patch('recipes.signals.update_search_vector') as signal:
+            with self.captureOnCommitCallbacks(execute=True):
+                recipe_id = self.create(5)
+            deferred.assert_called_once_with(pk=recipe_id)
+            deferred.reset_mock()
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(
+                    f'/api/recipes/{recipe_id}/', self.payload(2, amount=3),
+                    format='json'
+                )
+            self.assertEqual(response.status_code, 200, response.data)
+            deferred.assert_called_once_with(pk=recipe_id)
+            signal.assert_not_called()
+
+    def test_search_vector_updated_on_admin_edit(self):
+        recipe = self.recipes[0]
+        with mock.patch('recipes.signals.update_search_vector') as signal:
+            AmountIngredient.objects.create(
+                recipe=recipe, ingredients=self.ingredients[-1], amount=1
+            )
+        signal.assert_called_once_with(pk=recipe.id)
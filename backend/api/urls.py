@@ -1,9 +1,12 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from users.views import UserViewSet
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+from . import async_views
+from .views import (IngredientViewSet, RecipeViewSet, TagViewSet,
+                    prometheus_metrics)
 
 app_name = 'api'
 router = DefaultRouter()
@@ -12,7 +15,28 @@ router.register('tags', TagViewSet, basename='tags')
 router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('ingredients', IngredientViewSet, basename='ingredients')
 
+# Под ASGI перекрывают те же адреса из роутера.
+async_urlpatterns = [
+    path('tags/', async_views.tag_list, name='tags-list'),
+    path('tags/<int:pk>/', async_views.tag_detail, name='tags-detail'),
+    path(
+        'ingredients/', async_views.ingredient_list,
+        name='ingredients-list'
+    ),
+    path(
+        'ingredients/<int:pk>/', async_views.ingredient_detail,
+        name='ingredients-detail'
+    ),
+    path(
+        'recipes/download_shopping_cart/',
+        async_views.download_shopping_cart,
+        name='recipes-download-shopping-cart'
+    ),
+]
+
 urlpatterns = [
+    path('metrics/', prometheus_metrics, name='metrics'),
+    *(async_urlpatterns if settings.ASYNC_VIEWS else []),
     path('', include(router.urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
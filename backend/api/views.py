@@ -1,24 +1,74 @@
-from django.db.models import F, Sum
-from django.http.response import HttpResponse
+import hmac
+from hashlib import md5
+
+from django.conf import settings
+from django.http import Http404
+from django.http.response import (HttpResponse, HttpResponseForbidden,
+                                  HttpResponseNotModified,
+                                  StreamingHttpResponse)
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags, urlencode
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from recipes.models import (AmountIngredient, FavoriteRecipe, Ingredient,
-                            Recipe, ShoppingCart, Tag)
+from recipes.cache import (RECIPES_VERSION, get_response, get_versions,
+                           recipe_version, recipes_modified, set_response)
+from recipes.models import (FavoriteRecipe, Ingredient, Recipe, ShoppingCart,
+                            Tag)
+from recipes.search import ingredient_index
+from recipes.shopping_list import download_rows
+from recipes.tags import TAGS_VERSION, tag_registry
+from recipes.user_state import user_state
 from users.permissions import CurrentUserOrAdmin, GetPost
 
+from .conditional import make_etag, not_modified, set_validators
 from .filters import RecipeFilter
-from .pagination import SixItemPagination
+from .metrics import metrics, render_metrics
+from .pagination import RecipePagination
+from .renderers import CSVRenderer, PDFRenderer, PlainTextRenderer
 from .serializers import (CreateRecipeSerializer, FavoriteCreateSerializer,
                           FavoriteSerializer, IngredientSerializer,
                           RecipeSerializer, ShoppingCartCreateSerializer,
                           TagSerializer)
 
 
+def prometheus_metrics(request):
+    """Метрики запросов в текстовом формате Prometheus.
+
+    Нужен заголовок Authorization: Bearer <METRICS_TOKEN>; если токен
+    не задан, метрики доступны только при DEBUG.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = hmac.compare_digest(
+            request.headers.get('Authorization', ''), f'Bearer {token}'
+        )
+    else:
+        allowed = settings.DEBUG
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(*metrics.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def tag_list_response(request, snapshot):
+    """Готовый JSON из справочника тегов с ETag."""
+    etags = parse_etags(request.headers.get('If-None-Match', ''))
+    if snapshot.etag in etags or '*' in etags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(
+            snapshot.content, content_type='application/json'
+        )
+    response['ETag'] = snapshot.etag
+    return response
+
+
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     """Получение списка тегов."""
     queryset = Tag.objects.all()
@@ -26,6 +76,16 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return tag_list_response(request, tag_registry.get())
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            tag = tag_registry.get().by_id[int(kwargs['pk'])]
+        except (KeyError, ValueError):
+            raise Http404
+        return Response(self.get_serializer(tag).data)
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     """Получение списка ингредиентов."""
@@ -34,15 +94,118 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        """Поиск по началу названия, затем по вхождению."""
+        name = request.query_params.get('name')
+        if not name:
+            return super().list(request, *args, **kwargs)
+        return Response(ingredient_index.search(name))
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     """Все действия с рецептами."""
     queryset = Recipe.objects.all()
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
-    pagination_class = SixItemPagination
+    pagination_class = RecipePagination
     permission_classes = [GetPost, CurrentUserOrAdmin]
 
+    def get_queryset(self):
+        if self.action == 'list':
+            # Остальное RecipeListSerializer берёт из кэша фрагментов.
+            return Recipe.objects.only('id', 'author_id')
+        if self.action == 'retrieve':
+            return Recipe.objects.for_feed()
+        return super().get_queryset()
+
+    def list(self, request, *args, **kwargs):
+        """Лента с ETag от версий данных и избранного пользователя.
+
+        Last-Modified только для анонима: флаги пользователя своего
+        времени изменения не имеют.
+        """
+        prefix = request.build_absolute_uri('/')
+        params = md5(urlencode(sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )).encode()).hexdigest()
+        versions = get_versions(RECIPES_VERSION, TAGS_VERSION)
+        anonymous = request.user.is_anonymous
+        etag = make_etag(
+            prefix, params, *versions, user_state(request).fingerprint()
+        )
+        last_modified = recipes_modified() if anonymous else None
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        if anonymous:
+            response = self.cached_response(
+                f'recipes:{prefix}:{params}', versions,
+                super().list, request, *args, **kwargs
+            )
+        else:
+            response = super().list(request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Рецепт с ETag и Last-Modified от updated_at рецепта и автора."""
+        try:
+            row = (
+                Recipe.objects
+                .filter(pk=kwargs['pk'])
+                .values_list(
+                    'id', 'author_id', 'updated_at', 'author__updated_at'
+                )
+                .first()
+            )
+        except (TypeError, ValueError):
+            row = None
+        if row is None:
+            return super().retrieve(request, *args, **kwargs)
+        recipe_id, author_id, *updated = row
+        prefix = request.build_absolute_uri('/')
+        modified = max(updated).timestamp()
+        state = user_state(request)
+        etag = make_etag(
+            prefix, modified,
+            state.is_favorited(recipe_id),
+            state.is_in_shopping_cart(recipe_id),
+            state.is_subscribed(author_id),
+        )
+        anonymous = request.user.is_anonymous
+        last_modified = modified if anonymous else None
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        if anonymous:
+            response = self.cached_response(
+                f'recipe:{prefix}:{recipe_id}',
+                get_versions(recipe_version(recipe_id), TAGS_VERSION),
+                super().retrieve, request, *args, **kwargs
+            )
+        else:
+            response = super().retrieve(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    def cached_response(self, key, versions, view, *args, **kwargs):
+        """Ответ анонимному пользователю из кэша.
+
+        Флаги пользователя у анонима всегда False, поэтому ответ зависит
+        только от параметров запроса и версий данных, которые меняют
+        сигналы recipes.signals.
+        """
+        data = get_response(key, versions)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+        response = view(*args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            set_response(key, versions, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
     def update(self, request, *args, **kwargs):
         if kwargs['partial'] is False:
             return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -142,28 +305,19 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @action(
         detail=False,
         methods=('get', ),
-        permission_classes=(IsAuthenticated, )
+        permission_classes=(IsAuthenticated, ),
+        renderer_classes=(PlainTextRenderer, CSVRenderer, PDFRenderer)
     )
     def download_shopping_cart(self, request):
-        """Скачивание ингредиентов из списка покупок."""
-        ingredients = (
-            AmountIngredient.objects
-            .filter(recipe__shopping_cart__user=request.user)
-            .values('ingredients__name', 'ingredients__measurement_unit')
-            .annotate(amount=Sum(F('amount')))
-            .order_by()
-        )
-        shop_list = []
-        for ingredient in ingredients:
-            name = ingredient['ingredients__name']
-            measurement_unit = ingredient['ingredients__measurement_unit']
-            amount = ingredient['amount']
-            shop_list.append(
-                f'\n{name} - {amount} {measurement_unit}')
-        result = 'shop_list.txt'
-        response = HttpResponse(
-            shop_list,
-            content_type='text/plain'
+        """Скачивание ингредиентов из списка покупок.
+
+        Формат выбирается параметром ?format=txt|csv|pdf.
+        """
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(download_rows(request.user.id).iterator()),
+            content_type=renderer.content_type
         )
+        result = f'shop_list.{renderer.format}'
         response['Content-Disposition'] = f'attachment; filename={result}'
         return response
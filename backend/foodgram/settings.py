@@ -48,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -146,6 +147,32 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Кэш общий для backend и image_worker: версии, ответы и фрагменты
+# рецептов, инвалидация из воркера видна веб-процессам. Объём Redis
+# ограничивает maxmemory в docker-compose; MAX_ENTRIES — для
+# локального запуска с locmem, file или db вместо Redis.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', default='django_redis.cache.RedisCache'
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', default='redis://redis:6379/1'
+        ),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', default=300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.getenv('CACHE_MAX_ENTRIES', default=100000)
+            ),
+        },
+    }
+}
+
+SHOPPING_LIST_FONT = os.getenv(
+    'SHOPPING_LIST_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+
 # STATICFILES_DIRS = [
 #     os.path.join(BASE_DIR, "static"),
 # ]
@@ -168,14 +195,36 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_PAGINATION_CLASS':
-    'rest_framework.pagination.PageNumberPagination',
+    'api.pagination.ApproximateCountPagination',
     'PAGE_SIZE': 25,
 }
 
+APPROXIMATE_COUNT_THRESHOLD = int(
+    os.getenv('APPROXIMATE_COUNT_THRESHOLD', default=10000)
+)
+
+COUNT_CACHE_TIMEOUT = int(os.getenv('COUNT_CACHE_TIMEOUT', default=60))
+
+# Токен для /api/metrics/; без него метрики отдаются только при DEBUG.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', default='')
+
+# Сколько одинаковых SQL в одном запросе считать вероятным N+1.
+QUERY_REPEAT_THRESHOLD = int(
+    os.getenv('QUERY_REPEAT_THRESHOLD', default=5)
+)
+
+# Асинхронные view тегов, ингредиентов и скачивания списка покупок.
+# По той же переменной gunicorn.conf.py запускает uvicorn-воркеры.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', default='False') == 'True'
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
 
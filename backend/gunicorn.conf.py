@@ -0,0 +1,11 @@
+import os
+
+bind = '0:8000'
+
+# ASYNC_VIEWS=True: ASGI-приложение под uvicorn-воркерами, медленные
+# клиенты не занимают воркер целиком.
+if os.getenv('ASYNC_VIEWS', default='False') == 'True':
+    wsgi_app = 'foodgram.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'foodgram.wsgi:application'
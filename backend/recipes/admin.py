@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from . import models
+from .search import full_text_supported, search_recipes
 
 
 @admin.register(models.Tag)
@@ -24,11 +25,16 @@ class AmountIngredientInLine(admin.TabularInline):
 
 @admin.register(models.Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('author', 'name',)
+    list_display = ('author', 'name', 'favorites_count', 'image_status')
     search_fields = ('name',)
     list_filter = ('author', 'name', 'tags')
     inlines = (AmountIngredientInLine,)
 
+    def get_search_results(self, request, queryset, search_term):
+        if search_term and full_text_supported():
+            return search_recipes(queryset, search_term), False
+        return super().get_search_results(request, queryset, search_term)
+
 
 @admin.register(models.Subscribe)
 class SubscribeAdmin(admin.ModelAdmin):
@@ -49,3 +55,15 @@ class ShoppingCart(admin.ModelAdmin):
     list_display = ('user', 'recipe')
     search_fields = ('user', 'recipe')
     list_filter = ('user', 'recipe')
+
+
+@admin.register(models.ShoppingListItem)
+class ShoppingListItem(admin.ModelAdmin):
+    list_display = ('user', 'ingredient', 'total_amount')
+    list_filter = ('user',)
+
+
+@admin.register(models.ImageJob)
+class ImageJob(admin.ModelAdmin):
+    list_display = ('recipe', 'image', 'status', 'attempts', 'updated')
+    list_filter = ('status',)
@@ -0,0 +1,114 @@
+import time
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'version:{}'
+RECIPES_VERSION = 'recipes'
+RECIPES_MODIFIED_KEY = 'modified:recipes'
+RESPONSE_KEY = 'response:{}:{}'
+RESPONSE_TIMEOUT = 60 * 60
+FRAGMENT_KEY = 'fragment:{}'
+FRAGMENT_TIMEOUT = 24 * 60 * 60
+HITS_KEY = 'stats:responses:hits'
+MISSES_KEY = 'stats:responses:misses'
+
+
+def get_version(name):
+    """Текущая версия данных name, общая для всех процессов.
+
+    Версия — случайная строка, а не счётчик: после вытеснения ключа из
+    кэша новая версия не совпадёт ни с одной из старых.
+    """
+    return get_versions(name)[0]
+
+
+def bump_version(name):
+    """Новая версия данных name: всё закэшированное по старой устарело."""
+    cache.set(VERSION_KEY.format(name), uuid4().hex, timeout=None)
+
+
+def get_versions(*names):
+    """Версии нескольких наборов данных за одно обращение к кэшу.
+
+    Если кэш не сохранил новую версию (например, DummyCache), она всё
+    равно возвращается: закэшированное по ней просто не найдётся.
+    """
+    keys = [VERSION_KEY.format(name) for name in names]
+    versions = cache.get_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, timeout=None)
+        missing.update(cache.get_many(list(missing)))
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def recipe_version(recipe_id):
+    return f'recipe:{recipe_id}'
+
+
+def invalidate_recipes(recipe_ids):
+    """Новые версии рецептов и ленты после фиксации транзакции.
+
+    Раньше фиксации нельзя: параллельный запрос успел бы закэшировать
+    старые данные под новой версией.
+    """
+    names = [RECIPES_VERSION, *map(recipe_version, set(recipe_ids))]
+    transaction.on_commit(lambda: cache.set_many(
+        {
+            RECIPES_MODIFIED_KEY: time.time(),
+            **{VERSION_KEY.format(name): uuid4().hex for name in names},
+        },
+        timeout=None
+    ))
+
+
+def recipes_modified():
+    """Время последнего изменения рецептов (timestamp) или None."""
+    return cache.get(RECIPES_MODIFIED_KEY)
+
+
+def get_response(key, versions):
+    """Закэшированные данные ответа или None; учитывается в статистике."""
+    data = cache.get(RESPONSE_KEY.format(key, ':'.join(versions)))
+    counter = MISSES_KEY if data is None else HITS_KEY
+    cache.add(counter, 0, timeout=None)
+    cache.incr(counter)
+    return data
+
+
+def set_response(key, versions, data):
+    cache.set(
+        RESPONSE_KEY.format(key, ':'.join(versions)), data, RESPONSE_TIMEOUT
+    )
+
+
+def get_fragments(keys):
+    """Закэшированные фрагменты по словарю «id -> ключ»: id -> данные."""
+    found = cache.get_many([FRAGMENT_KEY.format(key) for key in keys.values()])
+    return {
+        identifier: found[FRAGMENT_KEY.format(key)]
+        for identifier, key in keys.items()
+        if FRAGMENT_KEY.format(key) in found
+    }
+
+
+def set_fragments(fragments):
+    """Сохранение фрагментов по словарю «ключ -> данные»."""
+    cache.set_many(
+        {FRAGMENT_KEY.format(key): data for key, data in fragments.items()},
+        FRAGMENT_TIMEOUT
+    )
+
+
+def response_stats():
+    """Попадания и промахи кэша ответов."""
+    stats = cache.get_many([HITS_KEY, MISSES_KEY])
+    return stats.get(HITS_KEY, 0), stats.get(MISSES_KEY, 0)
+
+
+def reset_response_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
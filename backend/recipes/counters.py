@@ -0,0 +1,34 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, field):
+    """Подзапрос: количество строк model, ссылающихся на объект."""
+    return Coalesce(Subquery(
+        model.objects
+        .filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def shift(model, pk, field, delta):
+    """Атомарное изменение счётчика field на delta."""
+    model.objects.filter(pk=pk).update(**{field: F(field) + delta})
+
+
+def recount(recipe_model, user_model, favorite_model, subscribe_model):
+    """Пересчёт всех счётчиков одним UPDATE на таблицу.
+
+    Модели передаются явно: миграция 0007 вызывает пересчёт с
+    историческими моделями из apps.get_model.
+    """
+    recipe_model.objects.update(
+        favorites_count=count_of(favorite_model, 'recipe')
+    )
+    user_model.objects.update(
+        recipes_count=count_of(recipe_model, 'author'),
+        subscribers_count=count_of(subscribe_model, 'author'),
+    )
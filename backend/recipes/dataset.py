@@ -0,0 +1,411 @@
+import io
+import json
+import random
+import re
+from datetime import datetime
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max, Q, Sum
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from users.models import CustomUser
+
+from .cache import RECIPES_VERSION, bump_version
+from .counters import recount
+from .models import (AmountIngredient, FavoriteRecipe, ImageJob, Ingredient,
+                     Recipe, ShoppingCart, ShoppingListItem, Subscribe, Tag)
+from .search import ingredient_index, update_search_vector
+from .tags import TAGS_VERSION
+
+BATCH_SIZE = 1000
+COPY_BATCH_SIZE = 50000
+SIZES = {
+    'users': 100,
+    'recipes': 1000,
+    'tags': 8,
+    'ingredients': 500,
+    'ingredients_per_recipe': 8,
+    'favorites': 20,
+    'cart': 5,
+    'subscriptions': 10,
+}
+SCALED = ('users', 'recipes', 'ingredients')
+# Показатели закона Ципфа: чем больше, тем сильнее перекос в пользу
+# первых рецептов, авторов, тегов и ингредиентов.
+POPULARITY = 1.0
+FOLLOWERS = 1.2
+# Показатель Парето для числа избранного, покупок и подписок
+# пользователя: большинство делает мало, немногие — очень много.
+ACTIVITY = 1.5
+
+
+def sizes_for(scale):
+    """Размеры набора: пользователи, рецепты и ингредиенты растут
+    пропорционально scale, остальное — на пользователя или рецепт.
+    """
+    return {
+        name: max(1, round(size * scale)) if name in SCALED else size
+        for name, size in SIZES.items()
+    }
+
+
+def user_filter(prefix):
+    return Q(email__endswith=f'@{prefix}.local')
+
+
+def tag_filter(prefix):
+    return Q(slug__regex=rf'^{re.escape(prefix)}-[0-9]+$')
+
+
+def ingredient_filter(prefix):
+    return Q(name__regex=rf'^{re.escape(prefix)} ингредиент [0-9]+$')
+
+
+def exists(prefix):
+    """Есть ли в базе строки набора с этим prefix."""
+    return (
+        CustomUser.objects.filter(user_filter(prefix)).exists()
+        or Tag.objects.filter(tag_filter(prefix)).exists()
+        or Ingredient.objects.filter(ingredient_filter(prefix)).exists()
+    )
+
+
+def zipf(count, exponent):
+    """Накопленные веса закона Ципфа для random.choices."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)
+    ))
+
+
+def activity(rng, mean, limit):
+    """Число действий пользователя: Парето со средним mean."""
+    scale = mean * (ACTIVITY - 1) / ACTIVITY
+    return min(int(scale * rng.paretovariate(ACTIVITY)), limit)
+
+
+def distinct_choices(rng, weights, count):
+    """До count разных индексов, выбранных с весами weights."""
+    population = range(len(weights))
+    chosen = set()
+    for _ in range(10):
+        if len(chosen) >= count:
+            break
+        chosen.update(rng.choices(
+            population, cum_weights=weights, k=count - len(chosen)
+        ))
+    return sorted(chosen)[:count]
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    batch = list(islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, size))
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+
+def copy_value(value):
+    """Значение в текстовом формате COPY."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    elif isinstance(value, datetime):
+        value = value.isoformat()
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t')
+        .replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def copy_rows(model, columns, rows):
+    """COPY FROM STDIN пачками; остальные поля — значения по умолчанию
+    модели, первичный ключ без значения выдаёт база.
+    """
+    now = timezone.now()
+    defaults = {}
+    for field in model._meta.concrete_fields:
+        if field.primary_key or field.attname in columns:
+            continue
+        if getattr(field, 'auto_now', False) or getattr(
+            field, 'auto_now_add', False
+        ):
+            defaults[field.column] = now
+        else:
+            defaults[field.column] = field.get_default()
+    names = [model._meta.get_field(column).column for column in columns]
+    sql = 'COPY {} ({}) FROM STDIN'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(map(connection.ops.quote_name, [*names, *defaults]))
+    )
+    tail = [copy_value(value) for value in defaults.values()]
+    with connection.cursor() as cursor:
+        for batch in batches(rows, COPY_BATCH_SIZE):
+            buffer = io.StringIO()
+            for row in batch:
+                buffer.write('\t'.join([*map(copy_value, row), *tail]))
+                buffer.write('\n')
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+
+
+def write_rows(model, columns, rows):
+    """Строки-кортежи в порядке columns: COPY в PostgreSQL,
+    bulk_create в остальных базах.
+    """
+    if connection.vendor == 'postgresql':
+        copy_rows(model, columns, rows)
+        return
+    for batch in batches(rows, BATCH_SIZE):
+        model.objects.bulk_create(
+            [model(**dict(zip(columns, row))) for row in batch]
+        )
+
+
+def insert_from(model, columns, queryset):
+    """INSERT ... SELECT: строки queryset.values_list() в model."""
+    sql, params = queryset.query.sql_with_params()
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {} ({}) {}'.format(
+                quote(model._meta.db_table),
+                ', '.join(
+                    quote(model._meta.get_field(column).column)
+                    for column in columns
+                ),
+                sql
+            ),
+            params
+        )
+
+
+def delete_from(queryset):
+    """DELETE ... WHERE pk IN (SELECT ...) одним запросом, без сигналов
+    и каскадов Django.
+    """
+    model = queryset.model
+    sql, params = queryset.values('pk').query.sql_with_params()
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM {} WHERE {} IN ({})'.format(
+                quote(model._meta.db_table), quote(model._meta.pk.column), sql
+            ),
+            params
+        )
+
+
+@transaction.atomic
+def create(prefix='bench', seed=0, **sizes):
+    """Синтетический набор данных; одинаковый seed — одинаковые данные.
+
+    Популярность рецептов, авторов и ингредиентов подчиняется закону
+    Ципфа, активность пользователей — распределению Парето. Строки
+    генерируются потоком и пишутся пачками без сигналов, поэтому
+    счётчики, списки покупок, поисковые векторы и версии кэша
+    обновляются в конце. Удаляется функцией remove с тем же prefix;
+    если набор с этим prefix уже есть — ValueError.
+    """
+    if exists(prefix):
+        raise ValueError(f'Набор {prefix} уже есть в базе.')
+    sizes = {**SIZES, **sizes}
+    rng = random.Random(seed)
+    users = sizes['users']
+    recipes = sizes['recipes']
+    # id задаются явно, чтобы связи строились без чтения из базы.
+    first_user = next_id(CustomUser)
+    first_tag = next_id(Tag)
+    first_ingredient = next_id(Ingredient)
+    first_recipe = next_id(Recipe)
+
+    password = make_password(None)
+    write_rows(
+        CustomUser,
+        ('id', 'username', 'email', 'first_name', 'last_name', 'password'),
+        (
+            (first_user + number, f'{prefix}_{number}',
+             f'user{number}@{prefix}.local', f'Имя {number}',
+             f'Фамилия {number}', password)
+            for number in range(users)
+        )
+    )
+    # Цвета занятые в базе пропускаются; отдельный генератор, чтобы
+    # пропуски не сдвигали остальные случайные данные.
+    palette = random.Random(seed)
+    colors = set(Tag.objects.values_list('color', flat=True))
+    tags = []
+    for number in range(sizes['tags']):
+        color = f'#{palette.randrange(0x1000000):06X}'
+        while color in colors:
+            color = f'#{palette.randrange(0x1000000):06X}'
+        colors.add(color)
+        tags.append((
+            first_tag + number, f'{prefix} {number}', color,
+            f'{prefix}-{number}'
+        ))
+    write_rows(Tag, ('id', 'name', 'color', 'slug'), tags)
+    write_rows(
+        Ingredient, ('id', 'name', 'measurement_unit'),
+        (
+            (first_ingredient + number, f'{prefix} ингредиент {number}',
+             rng.choice(('г', 'мл', 'шт.')))
+            for number in range(sizes['ingredients'])
+        )
+    )
+
+    authors = zipf(users, POPULARITY)
+    write_rows(
+        Recipe,
+        ('id', 'author_id', 'name', 'text', 'cooking_time', 'image'),
+        (
+            (first_recipe + number,
+             first_user + rng.choices(range(users), cum_weights=authors)[0],
+             f'{prefix} рецепт {number}',
+             f'Описание рецепта {number}. ' * rng.randint(1, 20),
+             rng.randint(1, 300), 'recipes/benchmark.jpg')
+            for number in range(recipes)
+        )
+    )
+    tag_weights = zipf(sizes['tags'], POPULARITY)
+    most_tags = min(3, sizes['tags'])
+    write_rows(
+        Recipe.tags.through, ('recipe_id', 'tag_id'),
+        (
+            (first_recipe + number, first_tag + tag)
+            for number in range(recipes)
+            for tag in distinct_choices(
+                rng, tag_weights, rng.randint(1, most_tags)
+            )
+        )
+    )
+    ingredient_weights = zipf(sizes['ingredients'], POPULARITY)
+    per_recipe = sizes['ingredients_per_recipe']
+    write_rows(
+        AmountIngredient, ('recipe_id', 'ingredients_id', 'amount'),
+        (
+            (first_recipe + number, first_ingredient + ingredient,
+             rng.randint(1, 30))
+            for number in range(recipes)
+            for ingredient in distinct_choices(
+                rng, ingredient_weights,
+                round(rng.triangular(1, 2 * per_recipe - 1, per_recipe))
+            )
+        )
+    )
+
+    popular = zipf(recipes, POPULARITY)
+    for model, mean in (
+        (FavoriteRecipe, sizes['favorites']),
+        (ShoppingCart, sizes['cart']),
+    ):
+        write_rows(
+            model, ('user_id', 'recipe_id'),
+            (
+                (first_user + user, first_recipe + recipe)
+                for user in range(users)
+                for recipe in distinct_choices(
+                    rng, popular, activity(rng, mean, recipes)
+                )
+            )
+        )
+    followed = zipf(users, FOLLOWERS)
+
+    def subscriptions():
+        for user in range(users):
+            count = activity(rng, sizes['subscriptions'], users - 1)
+            authors = [
+                author
+                for author in distinct_choices(rng, followed, count + 1)
+                if author != user
+            ]
+            for author in authors[:count]:
+                yield first_user + user, first_user + author
+
+    write_rows(Subscribe, ('user_id', 'author_id'), subscriptions())
+
+    seeded = CustomUser.objects.filter(user_filter(prefix))
+    insert_from(
+        ShoppingListItem, ('user_id', 'ingredient_id', 'total_amount'),
+        AmountIngredient.objects
+        .filter(recipe__shopping_cart__user__in=seeded)
+        .values_list('recipe__shopping_cart__user', 'ingredients')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(
+            no_style(), [CustomUser, Tag, Ingredient, Recipe]
+        ):
+            cursor.execute(sql)
+    recount(Recipe, CustomUser, FavoriteRecipe, Subscribe)
+    update_search_vector(author__in=seeded)
+    transaction.on_commit(refresh_caches)
+    return {
+        'users': users,
+        'recipes': recipes,
+        'ingredients': sizes['ingredients'],
+        'amounts': AmountIngredient.objects.filter(
+            recipe__author__in=seeded
+        ).count(),
+        'favorites': FavoriteRecipe.objects.filter(user__in=seeded).count(),
+        'cart': ShoppingCart.objects.filter(user__in=seeded).count(),
+        'subscriptions': Subscribe.objects.filter(user__in=seeded).count(),
+    }
+
+
+@transaction.atomic
+def remove(prefix='bench'):
+    """Удаление набора, созданного create с тем же prefix.
+
+    Строки удаляются напрямую, без сигналов и каскадов Django:
+    по одной на каждое избранное это заняло бы минуты. Счётчики
+    и кэши пересчитываются в конце.
+    """
+    users = CustomUser.objects.filter(user_filter(prefix))
+    recipes = Recipe.objects.filter(author__in=users)
+    tags = Tag.objects.filter(tag_filter(prefix))
+    ingredients = Ingredient.objects.filter(ingredient_filter(prefix))
+    for queryset in (
+        ShoppingListItem.objects.filter(
+            Q(user__in=users) | Q(ingredient__in=ingredients)
+        ),
+        ShoppingCart.objects.filter(Q(user__in=users) | Q(recipe__in=recipes)),
+        FavoriteRecipe.objects.filter(
+            Q(user__in=users) | Q(recipe__in=recipes)
+        ),
+        Subscribe.objects.filter(Q(user__in=users) | Q(author__in=users)),
+        AmountIngredient.objects.filter(
+            Q(recipe__in=recipes) | Q(ingredients__in=ingredients)
+        ),
+        Recipe.tags.through.objects.filter(
+            Q(recipe__in=recipes) | Q(tag__in=tags)
+        ),
+        ImageJob.objects.filter(recipe__in=recipes),
+        recipes,
+        Token.objects.filter(user__in=users),
+        users,
+        tags,
+        ingredients,
+    ):
+        delete_from(queryset)
+    recount(Recipe, CustomUser, FavoriteRecipe, Subscribe)
+    transaction.on_commit(refresh_caches)
+
+
+def refresh_caches():
+    bump_version(RECIPES_VERSION)
+    bump_version(TAGS_VERSION)
+    ingredient_index.invalidate()
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .cache import invalidate_recipes
+from .images import RENDITIONS_DIR
+from .models import ImageJob, Recipe
+from .storage import content_storage
+
+MAX_ATTEMPTS = 3
+JOB_TIMEOUT = timedelta(minutes=10)
+
+
+def enqueue(recipe):
+    """Постановка изображения рецепта в очередь на обработку.
+
+    До окончания обработки рецепт отдаёт исходное изображение
+    без уменьшенных копий.
+    """
+    Recipe.objects.filter(pk=recipe.pk).update(
+        image_status=Recipe.IMAGE_PENDING, image_renditions={},
+        updated_at=timezone.now()
+    )
+    recipe.image_status = Recipe.IMAGE_PENDING
+    recipe.image_renditions = {}
+    return ImageJob.objects.create(recipe=recipe, image=recipe.image.name)
+
+
+def claim(limit):
+    """Захват задач из очереди.
+
+    Задачи, зависшие в обработке дольше JOB_TIMEOUT (например, после
+    падения обработчика), выдаются повторно.
+    """
+    stale = timezone.now() - JOB_TIMEOUT
+    with transaction.atomic():
+        jobs = list(
+            ImageJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=ImageJob.PENDING)
+                | Q(status=ImageJob.PROCESSING, updated__lt=stale)
+            )[:limit]
+        )
+        ImageJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=ImageJob.PROCESSING,
+            attempts=F('attempts') + 1,
+            updated=timezone.now()
+        )
+    for job in jobs:
+        job.status = ImageJob.PROCESSING
+        job.attempts += 1
+    return jobs
+
+
+def read_source(job):
+    with content_storage.open(job.image) as file:
+        return file.read()
+
+
+def is_current(job):
+    """Не заменили ли изображение рецепта после постановки задачи."""
+    return Recipe.objects.filter(pk=job.recipe_id, image=job.image).exists()
+
+
+def complete(job, name, content, renditions):
+    """Сохранение результата обработки в рецепт.
+
+    Исходный файл не удаляется: в хранилище с адресацией по содержимому
+    он может принадлежать и другому рецепту. Его уберёт collect_images.
+    """
+    image = content_storage.save(
+        Recipe._meta.get_field('image').generate_filename(None, name),
+        ContentFile(content)
+    )
+    stored = {
+        str(width): content_storage.save(
+            f'{RENDITIONS_DIR}/{width}.webp', ContentFile(data)
+        )
+        for width, data in renditions.items()
+    }
+    with transaction.atomic():
+        Recipe.objects.filter(pk=job.recipe_id, image=job.image).update(
+            image=image, image_renditions=stored,
+            image_status=Recipe.IMAGE_READY, updated_at=timezone.now()
+        )
+        ImageJob.objects.filter(pk=job.pk).update(status=ImageJob.DONE)
+        invalidate_recipes([job.recipe_id])
+
+
+def skip(job):
+    """Изображение рецепта заменено, задача больше не нужна."""
+    ImageJob.objects.filter(pk=job.pk).update(status=ImageJob.DONE)
+
+
+def fail(job, error):
+    """Ошибка обработки: повтор или отказ после MAX_ATTEMPTS попыток."""
+    final = job.attempts >= MAX_ATTEMPTS
+    with transaction.atomic():
+        ImageJob.objects.filter(pk=job.pk).update(
+            status=ImageJob.FAILED if final else ImageJob.PENDING,
+            error=error
+        )
+        if final:
+            Recipe.objects.filter(pk=job.recipe_id, image=job.image).update(
+                image_status=Recipe.IMAGE_FAILED, updated_at=timezone.now()
+            )
+            invalidate_recipes([job.recipe_id])
@@ -0,0 +1,128 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+MAX_IMAGE_SIZE = 1600
+RENDITION_WIDTHS = (240, 480, 960)
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+RENDITIONS_DIR = 'recipes/renditions'
+# Форматы, которые браузеры показывают без перекодирования.
+WEB_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+EXIF_ORIENTATION = 0x0112
+# Сегменты JPEG с метаданными: APP1 (EXIF, XMP) и APP13 (IPTC).
+METADATA_MARKERS = (0xE1, 0xED)
+
+
+class ProcessedImage(ContentFile):
+    """Сжатое изображение рецепта вместе с уменьшенными копиями.
+
+    renditions — словарь «ширина -> содержимое WebP».
+    """
+
+    def __init__(self, content, name, renditions):
+        super().__init__(content, name=name)
+        self.renditions = renditions
+
+
+def encode(image, image_format, quality):
+    buffer = BytesIO()
+    image.save(
+        buffer, image_format, quality=quality, optimize=True,
+        **({'progressive': True} if image_format == 'JPEG' else {})
+    )
+    return buffer.getvalue()
+
+
+def strip_metadata(content):
+    """JPEG без сегментов METADATA_MARKERS, без перекодирования.
+
+    None, если структуру файла разобрать не удалось.
+    """
+    if content[:2] != b'\xff\xd8':
+        return None
+    parts = [content[:2]]
+    position = 2
+    while position + 4 <= len(content):
+        if content[position] != 0xFF:
+            return None
+        marker = content[position + 1]
+        if marker == 0xDA:
+            parts.append(content[position:])
+            return b''.join(parts)
+        end = position + 2 + int.from_bytes(
+            content[position + 2:position + 4], 'big'
+        )
+        if marker not in METADATA_MARKERS:
+            parts.append(content[position:end])
+        position = end
+    return None
+
+
+def flatten(image):
+    """RGB без прозрачности: прозрачные области становятся белыми."""
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def process_image(file):
+    """Обработка загруженного изображения.
+
+    Изображение декодируется один раз, поворачивается по EXIF,
+    уменьшается до MAX_IMAGE_SIZE и пересохраняется в JPEG без
+    метаданных; из него же получаются WebP-копии шириной
+    RENDITION_WIDTHS. Если размер в пределах и поворачивать не нужно,
+    а JPEG не меньше исходного файла, остаётся исходный файл веб-формата;
+    EXIF из него вырезается без перекодирования.
+    """
+    file.seek(0)
+    original = file.read()
+    file.seek(0)
+    with Image.open(file) as source:
+        exif = source.getexif()
+        if source.format not in WEB_FORMATS:
+            original = None
+        elif exif:
+            original = (
+                strip_metadata(original)
+                if source.format == 'JPEG'
+                and exif.get(EXIF_ORIENTATION, 1) == 1 else None
+            )
+        size = source.size
+        # JPEG сразу декодируется в уменьшенном масштабе.
+        source.draft('RGB', (MAX_IMAGE_SIZE, MAX_IMAGE_SIZE))
+        image = flatten(ImageOps.exif_transpose(source))
+    image.thumbnail((MAX_IMAGE_SIZE, MAX_IMAGE_SIZE), Image.LANCZOS)
+    renditions = {}
+    for width in RENDITION_WIDTHS:
+        if width >= image.width:
+            break
+        height = round(image.height * width / image.width)
+        renditions[width] = encode(
+            image.resize((width, height), Image.LANCZOS),
+            'WEBP', WEBP_QUALITY
+        )
+    name = os.path.basename(file.name)
+    content = encode(image, 'JPEG', JPEG_QUALITY)
+    if (original is not None and image.size == size
+            and len(content) >= len(original)):
+        content = original
+    else:
+        name = f'{os.path.splitext(name)[0]}.jpg'
+    return ProcessedImage(content, name, renditions)
+
+
+def render(content, name):
+    """Обработка изображения в дочернем процессе пула.
+
+    Принимает и возвращает только байты, чтобы не зависеть от
+    соединений с базой и хранилищем: (имя, содержимое, {ширина: WebP}).
+    """
+    processed = process_image(ContentFile(content, name=name))
+    return processed.name, processed.read(), processed.renditions
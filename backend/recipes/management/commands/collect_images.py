@@ -0,0 +1,65 @@
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.models import ImageJob, Recipe
+from recipes.storage import content_storage
+
+ROOT = 'recipes'
+
+
+def walk(storage, directory):
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield os.path.join(directory, name)
+    for name in directories:
+        yield from walk(storage, os.path.join(directory, name))
+
+
+class Command(BaseCommand):
+    help = 'Удаление изображений рецептов, на которые нет ссылок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=int, default=60,
+            help='Не трогать файлы моложе стольких минут: они могут '
+                 'принадлежать ещё не сохранённому рецепту.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.'
+        )
+
+    def handle(self, *args, **options):
+        if not content_storage.exists(ROOT):
+            return
+        referenced = set()
+        for image, renditions in Recipe.objects.values_list(
+            'image', 'image_renditions'
+        ).iterator():
+            referenced.add(image)
+            referenced.update(renditions.values())
+        referenced.update(
+            ImageJob.objects
+            .filter(status__in=(ImageJob.PENDING, ImageJob.PROCESSING))
+            .values_list('image', flat=True)
+        )
+        threshold = timezone.now() - timedelta(minutes=options['min_age'])
+        removed = freed = 0
+        for name in walk(content_storage, ROOT):
+            if name in referenced:
+                continue
+            if content_storage.get_modified_time(name) > threshold:
+                continue
+            removed += 1
+            freed += content_storage.size(name)
+            if options['dry_run']:
+                self.stdout.write(name)
+            else:
+                content_storage.delete(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Неиспользуемых файлов: {removed}, '
+            f'{freed / 1024 / 1024:.1f} МБ.'
+        ))
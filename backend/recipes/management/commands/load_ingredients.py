@@ -0,0 +1,96 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import Ingredient
+from recipes.search import ingredient_index
+
+BATCH_SIZE = 1000
+READ_SIZE = 64 * 1024
+
+
+def iter_csv(file):
+    """Строки CSV вида «название,единица измерения»."""
+    for row in csv.reader(file):
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def iter_json(file):
+    """Объекты из JSON-массива, прочитанные по частям.
+
+    Файл не загружается в память целиком: из буфера раскодируются
+    готовые объекты, остаток дополняется следующим блоком.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    for chunk in iter(lambda: file.read(READ_SIZE), ''):
+        buffer += chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != '[':
+                    raise CommandError('Ожидается JSON-массив.')
+                started = True
+                position += 1
+                continue
+            if position >= len(buffer) or buffer[position] == ']':
+                break
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            yield item['name'], item['measurement_unit']
+        buffer = buffer[position:]
+    if buffer.strip() not in ('', ']'):
+        raise CommandError('Некорректный JSON в конце файла.')
+
+
+class Command(BaseCommand):
+    help = 'Загрузка ингредиентов из CSV или JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к ingredients.csv/.json')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Количество строк в одном INSERT.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        extension = os.path.splitext(path)[1].lower()
+        readers = {'.csv': iter_csv, '.json': iter_json}
+        if extension not in readers:
+            raise CommandError('Поддерживаются только файлы .csv и .json.')
+        batch_size = options['batch_size']
+        total = 0
+        started = time.monotonic()
+        with open(path, encoding='utf-8') as file, transaction.atomic():
+            rows = readers[extension](file)
+            while True:
+                batch = dict.fromkeys(
+                    (name.strip(), unit.strip())
+                    for name, unit in islice(rows, batch_size)
+                )
+                if not batch:
+                    break
+                Ingredient.objects.bulk_create(
+                    [Ingredient(name=name, measurement_unit=unit)
+                     for name, unit in batch],
+                    ignore_conflicts=True
+                )
+                total += len(batch)
+        ingredient_index.invalidate()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано строк: {total} за {elapsed:.2f} с '
+            f'({total / max(elapsed, 1e-6):.0f} строк/с).'
+        ))
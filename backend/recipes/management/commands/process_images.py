@@ -0,0 +1,74 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from recipes import image_jobs
+from recipes.images import render
+
+
+class Command(BaseCommand):
+    help = (
+        'Обработка изображений рецептов из очереди: сжатие '
+        'и уменьшенные копии в пуле процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Количество процессов обработки.'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=None,
+            help='Сколько задач захватывать за раз, по умолчанию '
+                 'удвоенное число процессов.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=2,
+            help='Пауза между опросами пустой очереди, секунд.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Обработать очередь и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        batch = options['batch'] or 2 * options['workers']
+        with ProcessPoolExecutor(options['workers']) as pool:
+            while True:
+                close_old_connections()
+                jobs = image_jobs.claim(batch)
+                if jobs:
+                    self.process(pool, jobs)
+                    continue
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+
+    def process(self, pool, jobs):
+        futures = {}
+        for job in jobs:
+            if not image_jobs.is_current(job):
+                image_jobs.skip(job)
+                continue
+            try:
+                content = image_jobs.read_source(job)
+            except OSError as error:
+                self.fail(job, error)
+                continue
+            futures[job] = pool.submit(
+                render, content, os.path.basename(job.image)
+            )
+        for job, future in futures.items():
+            try:
+                image_jobs.complete(job, *future.result())
+            except Exception as error:
+                self.fail(job, error)
+                continue
+            self.stdout.write(f'{job.image} обработано')
+
+    def fail(self, job, error):
+        image_jobs.fail(job, repr(error))
+        self.stderr.write(f'{job.image}: {error!r}')
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from recipes import shopping_list
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Сверка ShoppingListItem с корзинами пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Пересобрать расходящиеся списки покупок.'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = (
+            CustomUser.objects
+            .filter(
+                Q(shopping_cart__isnull=False)
+                | Q(shopping_list__isnull=False)
+            )
+            .values_list('id', flat=True)
+            .distinct()
+            .order_by('id')
+        )
+        checked = mismatched = 0
+        for user_id in user_ids.iterator():
+            checked += 1
+            expected = {
+                ingredient: total
+                for ingredient, total
+                in shopping_list.live_totals(user_id).items() if total > 0
+            }
+            if shopping_list.stored_totals(user_id) == expected:
+                continue
+            mismatched += 1
+            self.stdout.write(f'Расхождение у пользователя {user_id}.')
+            if options['fix']:
+                shopping_list.rebuild(user_id)
+        self.stdout.write(
+            f'Проверено пользователей: {checked}, расхождений: {mismatched}.'
+        )
+        if mismatched and not options['fix']:
+            raise CommandError('Списки покупок расходятся с корзинами.')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from recipes.counters import recount
+from recipes.models import FavoriteRecipe, Recipe, Subscribe
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт счётчиков избранного, рецептов и подписчиков.'
+
+    def handle(self, *args, **options):
+        recount(Recipe, CustomUser, FavoriteRecipe, Subscribe)
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны.'))
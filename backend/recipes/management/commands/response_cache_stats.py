@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from recipes.cache import reset_response_stats, response_stats
+
+
+class Command(BaseCommand):
+    help = 'Доля попаданий кэша ответов для анонимных пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить счётчики после вывода.'
+        )
+
+    def handle(self, *args, **options):
+        hits, misses = response_stats()
+        total = hits + misses
+        ratio = hits / total if total else 0
+        self.stdout.write(
+            f'Попаданий: {hits}, промахов: {misses}, доля попаданий: '
+            f'{ratio:.1%}.'
+        )
+        if options['reset']:
+            reset_response_stats()
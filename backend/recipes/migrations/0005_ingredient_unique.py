@@ -0,0 +1,67 @@
+# Generated by Django 3.2.13 on 2026-10-17 06:15
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Слияние ингредиентов с одинаковыми названием и единицей измерения.
+
+    Остаётся ингредиент с наименьшим id, ссылки из AmountIngredient
+    переносятся на него; если в рецепте есть оба, количества
+    складываются. Других ссылок на Ingredient к этой миграции нет.
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    AmountIngredient = apps.get_model('recipes', 'AmountIngredient')
+    duplicates = (
+        Ingredient.objects
+        .values('name', 'measurement_unit')
+        .annotate(keep=Min('id'), count=Count('id'))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    for group in duplicates:
+        keep = group['keep']
+        extra = list(
+            Ingredient.objects
+            .filter(
+                name=group['name'],
+                measurement_unit=group['measurement_unit']
+            )
+            .exclude(pk=keep)
+            .values_list('pk', flat=True)
+        )
+        for amount in AmountIngredient.objects.filter(
+            ingredients_id__in=extra
+        ).order_by('id'):
+            kept = AmountIngredient.objects.filter(
+                recipe_id=amount.recipe_id, ingredients_id=keep
+            ).first()
+            if kept is None:
+                amount.ingredients_id = keep
+                amount.save(update_fields=['ingredients'])
+                continue
+            kept.amount = (kept.amount or 0) + (amount.amount or 0)
+            kept.save(update_fields=['amount'])
+            amount.delete()
+        Ingredient.objects.filter(pk__in=extra).delete()
+    if schema_editor.connection.vendor == 'postgresql':
+        # Иначе ALTER TABLE упадёт на отложенных проверках внешних ключей.
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_tagrecipe'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='уникальный ингредиент'),
+        ),
+    ]
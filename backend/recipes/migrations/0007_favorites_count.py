@@ -0,0 +1,31 @@
+# Generated by Django 3.2.13 on 2026-10-17 06:18
+
+from django.db import migrations, models
+
+from recipes.counters import recount
+
+
+def fill_counters(apps, schema_editor):
+    recount(
+        apps.get_model('recipes', 'Recipe'),
+        apps.get_model('users', 'CustomUser'),
+        apps.get_model('recipes', 'FavoriteRecipe'),
+        apps.get_model('recipes', 'Subscribe'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_counters'),
+        ('recipes', '0006_shoppinglistitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
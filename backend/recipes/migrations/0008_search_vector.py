@@ -0,0 +1,71 @@
+# Generated by Django 3.2.13 on 2026-10-17 06:22
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+INDEX_NAME = 'recipe_search_vector'
+SEARCH_CONFIG = 'russian'
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX "{INDEX_NAME}" ON "recipes_recipe" '
+        'USING gin ("search_vector")'
+    )
+    Recipe = apps.get_model('recipes', 'Recipe')
+    AmountIngredient = apps.get_model('recipes', 'AmountIngredient')
+    # Копия recipes.search.recipe_search_vector на момент миграции.
+    ingredient_names = Subquery(
+        AmountIngredient.objects
+        .filter(recipe=OuterRef('pk'))
+        .order_by()
+        .values('recipe')
+        .annotate(names=StringAgg('ingredients__name', ' '))
+        .values('names')
+    )
+    Recipe.objects.update(search_vector=(
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(
+            Coalesce(ingredient_names, Value('')),
+            weight='B', config=SEARCH_CONFIG
+        )
+        + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+    ))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{INDEX_NAME}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_favorites_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='recipe',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_vector'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_index, drop_search_index),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.13 on 2026-10-17 06:29
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_image_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=recipes.storage.ContentAddressedStorage(), upload_to='recipes/', verbose_name='Изображение блюда'),
+        ),
+    ]
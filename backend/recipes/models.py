@@ -1,8 +1,14 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Prefetch
+from django.utils import timezone
 
 from users.models import CustomUser
 
+from .storage import content_storage
+
 
 class Tag(models.Model):
     """Поле Tag в рецептах."""
@@ -47,14 +53,61 @@ class Ingredient(models.Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'measurement_unit'],
+                name='уникальный ингредиент'
+            )
+        ]
+        indexes = [
+            GinIndex(
+                fields=['name'], name='ingredient_name_trgm',
+                opclasses=['gin_trgm_ops']
+            ),
+        ]
         ordering = ('name',)
 
     def __str__(self):
         return f'{self.name} ({self.measurement_unit})'
 
 
+class RecipeQuerySet(models.QuerySet):
+    """Выборки рецептов."""
+
+    def for_feed(self):
+        """Рецепты со связанными данными.
+
+        Количество запросов не зависит от числа рецептов на странице.
+        Флаги пользователя считает recipes.user_state.
+        """
+        return self.defer('search_vector').select_related(
+            'author'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'amounts',
+                queryset=AmountIngredient.objects.select_related(
+                    'ingredients'
+                ).order_by('id')
+            ),
+        )
+
+    def touch(self):
+        """Отметка об изменении рецептов, сохранённых в обход save()."""
+        return self.update(updated_at=timezone.now())
+
+
 class Recipe(models.Model):
     """Сам рецепт со всеми составляющими."""
+    IMAGE_PENDING = 'pending'
+    IMAGE_READY = 'ready'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUSES = (
+        (IMAGE_PENDING, 'Обрабатывается'),
+        (IMAGE_READY, 'Готово'),
+        (IMAGE_FAILED, 'Ошибка обработки'),
+    )
+
     ingredients = models.ManyToManyField(
         Ingredient,
         verbose_name='Ингредиенты',
@@ -72,7 +125,20 @@ class Recipe(models.Model):
     )
     image = models.ImageField(
         verbose_name='Изображение блюда',
-        upload_to='recipes/'
+        upload_to='recipes/',
+        storage=content_storage
+    )
+    image_renditions = models.JSONField(
+        verbose_name='Уменьшенные копии изображения',
+        default=dict,
+        editable=False
+    )
+    image_status = models.CharField(
+        verbose_name='Состояние изображения',
+        max_length=16,
+        choices=IMAGE_STATUSES,
+        default=IMAGE_READY,
+        editable=False
     )
     name = models.CharField(
         verbose_name='Название блюда',
@@ -92,6 +158,22 @@ class Recipe(models.Model):
             ),
         ),
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Изменён',
+        auto_now=True
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт'
@@ -102,6 +184,13 @@ class Recipe(models.Model):
                 name='уникальный для автора'
             )
         ]
+        indexes = [
+            GinIndex(fields=['search_vector'], name='recipe_search_vector'),
+            # Лента: ORDER BY name и выборка id, author_id только по индексу.
+            models.Index(
+                fields=['name', 'id', 'author'], name='recipe_feed_order'
+            ),
+        ]
         ordering = ('name',)
 
     def __str__(self):
@@ -115,7 +204,8 @@ class AmountIngredient(models.Model):
     recipe = models.ForeignKey(
         Recipe, on_delete=models.CASCADE,
         verbose_name='В каких рецептах',
-        related_name='amounts'
+        related_name='amounts',
+        db_index=False
     )
     ingredients = models.ForeignKey(
         Ingredient, on_delete=models.CASCADE,
@@ -154,7 +244,8 @@ class Subscribe(models.Model):
     user = models.ForeignKey(
         CustomUser, on_delete=models.CASCADE,
         verbose_name='Подписчик',
-        related_name='subscription_on'
+        related_name='subscription_on',
+        db_index=False
     )
     author = models.ForeignKey(
         CustomUser, on_delete=models.CASCADE,
@@ -182,7 +273,8 @@ class FavoriteRecipe(models.Model):
     user = models.ForeignKey(
         CustomUser, on_delete=models.CASCADE,
         related_name='favorite_recipes',
-        verbose_name='Пользователь'
+        verbose_name='Пользователь',
+        db_index=False
     )
     recipe = models.ForeignKey(
         Recipe, on_delete=models.CASCADE,
@@ -194,7 +286,7 @@ class FavoriteRecipe(models.Model):
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
         constraints = [models.UniqueConstraint(
-            fields=['recipe', 'user'],
+            fields=['user', 'recipe'],
             name='уникальный избранный автор'
             )
         ]
@@ -208,7 +300,8 @@ class ShoppingCart(models.Model):
     """Лист покупок."""
     user = models.ForeignKey(
         CustomUser, related_name='shopping_cart',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     recipe = models.ForeignKey(
         Recipe, related_name='shopping_cart',
@@ -219,7 +312,7 @@ class ShoppingCart(models.Model):
         verbose_name = 'Список покупок для рецепта'
         verbose_name_plural = 'Списки покупок для рецепта'
         constraints = [models.UniqueConstraint(
-            fields=['recipe', 'user'],
+            fields=['user', 'recipe'],
             name='recipe_unique'
             )
         ]
@@ -229,6 +322,101 @@ class ShoppingCart(models.Model):
         return f'{self.user} - {self.recipe}'
 
 
+class ShoppingListItem(models.Model):
+    """Суммарное количество ингредиента в списке покупок пользователя.
+
+    Денормализация ShoppingCart и AmountIngredient, поддерживается
+    функциями из recipes.shopping_list.
+    """
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+        db_index=False
+    )
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Ингредиент'
+    )
+    total_amount = models.IntegerField(
+        verbose_name='Количество',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'Позиция списка покупок'
+        verbose_name_plural = 'Списки покупок'
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'ingredient'],
+            name='уникальный ингредиент в списке покупок'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user}: {self.ingredient} {self.total_amount}'
+
+
+class ImageJob(models.Model):
+    """Задача на обработку изображения рецепта.
+
+    Таблица служит очередью для команды process_images.
+    """
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (PROCESSING, 'Обрабатывается'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name='Рецепт'
+    )
+    image = models.CharField(
+        verbose_name='Исходное изображение',
+        max_length=100
+    )
+    status = models.CharField(
+        verbose_name='Состояние',
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток',
+        default=0
+    )
+    error = models.TextField(
+        verbose_name='Ошибка',
+        blank=True
+    )
+    created = models.DateTimeField(
+        verbose_name='Создана',
+        auto_now_add=True
+    )
+    updated = models.DateTimeField(
+        verbose_name='Изменена',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'Обработка изображения'
+        verbose_name_plural = 'Обработка изображений'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='image_job_queue'),
+        ]
+        ordering = ('id',)
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.image} ({self.status})'
+
+
 class TagRecipe(models.Model):
     """Описание модели свойства тега."""
     recipe = models.ForeignKey(
@@ -0,0 +1,158 @@
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connection, transaction
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .cache import bump_version, get_version
+from .models import AmountIngredient, Ingredient, Recipe
+
+SEARCH_LIMIT = 20
+SEARCH_CONFIG = 'russian'
+INGREDIENTS_VERSION = 'ingredients'
+search_update_deferred = ContextVar('search_update_deferred', default=False)
+
+
+def normalize(text):
+    """Приведение названия к виду для поиска: регистр и ё/е."""
+    return text.lower().replace('ё', 'е').strip()
+
+
+class IngredientIndex:
+    """Индекс названий ингредиентов в памяти процесса.
+
+    Ищет сначала по началу названия, затем по вхождению подстроки.
+    Перестраивается, когда меняется версия INGREDIENTS_VERSION в общем
+    кэше; версию увеличивает invalidate().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+
+    def invalidate(self):
+        """Новая версия индекса для всех процессов после фиксации
+        транзакции.
+        """
+        transaction.on_commit(lambda: bump_version(INGREDIENTS_VERSION))
+
+    def _build(self, version):
+        rows = Ingredient.objects.values('id', 'name', 'measurement_unit')
+        entries = sorted(
+            (normalize(row['name']), row['id'], row) for row in rows
+        )
+        keys = [key for key, _, _ in entries]
+        items = [row for _, _, row in entries]
+        return version, keys, items
+
+    def _get_state(self):
+        version = get_version(INGREDIENTS_VERSION)
+        state = self._state
+        if state is not None and state[0] == version:
+            return state
+        with self._lock:
+            state = self._state
+            if state is None or state[0] != version:
+                state = self._build(version)
+                self._state = state
+            return state
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Ингредиенты, подходящие под запрос, не больше limit штук."""
+        query = normalize(query)
+        _, keys, items = self._get_state()
+        if not query:
+            return items[:limit]
+        start = bisect_left(keys, query)
+        result = []
+        for position in range(start, len(keys)):
+            if len(result) >= limit or not keys[position].startswith(query):
+                break
+            result.append(items[position])
+        if len(result) >= limit:
+            return result
+        for position, key in enumerate(keys):
+            if query in key and not key.startswith(query):
+                result.append(items[position])
+                if len(result) >= limit:
+                    break
+        return result
+
+
+ingredient_index = IngredientIndex()
+
+
+def full_text_supported():
+    return connection.vendor == 'postgresql'
+
+
+def recipe_search_vector():
+    """Выражение поискового вектора рецепта: название, ингредиенты
+    и описание с весами A, B и C.
+    """
+    ingredient_names = Subquery(
+        AmountIngredient.objects
+        .filter(recipe=OuterRef('pk'))
+        .order_by()
+        .values('recipe')
+        .annotate(names=StringAgg('ingredients__name', ' '))
+        .values('names')
+    )
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(
+            Coalesce(ingredient_names, Value('')),
+            weight='B', config=SEARCH_CONFIG
+        )
+        + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(**filters):
+    """Пересчёт поискового вектора рецептов, подходящих под filters."""
+    if full_text_supported():
+        Recipe.objects.filter(**filters).update(
+            search_vector=recipe_search_vector()
+        )
+
+
+@contextmanager
+def defer_search_update():
+    """Запись рецепта через API: сигналы рецепта и его ингредиентов
+    не пересчитывают поисковый вектор на каждую строку, вызывающий код
+    пересчитывает его один раз через update_search_vector_on_commit.
+    """
+    token = search_update_deferred.set(True)
+    try:
+        yield
+    finally:
+        search_update_deferred.reset(token)
+
+
+def update_search_vector_on_commit(pk):
+    """Пересчёт вектора рецепта после коммита, когда записаны
+    и ингредиенты, и теги.
+    """
+    transaction.on_commit(lambda: update_search_vector(pk=pk))
+
+
+def search_recipes(queryset, text):
+    """Полнотекстовый поиск рецептов с сортировкой по релевантности.
+
+    Вне PostgreSQL — поиск по вхождению в название.
+    """
+    if not full_text_supported():
+        return queryset.filter(name__icontains=text)
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    return (
+        queryset
+        .filter(search_vector=query)
+        .annotate(rank=SearchRank(F('search_vector'), query))
+        .order_by('-rank', 'name')
+    )
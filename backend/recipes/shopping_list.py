@@ -0,0 +1,123 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import AmountIngredient, ShoppingCart, ShoppingListItem
+
+
+def recipe_amounts(recipe_id):
+    """Количество каждого ингредиента в рецепте."""
+    return dict(
+        AmountIngredient.objects
+        .filter(recipe_id=recipe_id)
+        .values_list('ingredients_id')
+        .annotate(total=Coalesce(Sum('amount'), 0))
+        .order_by()
+    )
+
+
+def live_totals(user_id):
+    """Список покупок пользователя, посчитанный по корзине."""
+    return dict(
+        AmountIngredient.objects
+        .filter(recipe__shopping_cart__user_id=user_id)
+        .values_list('ingredients_id')
+        .annotate(total=Coalesce(Sum('amount'), 0))
+        .order_by()
+    )
+
+
+def stored_totals(user_id):
+    """Список покупок пользователя из ShoppingListItem."""
+    return dict(
+        ShoppingListItem.objects
+        .filter(user_id=user_id)
+        .values_list('ingredient_id', 'total_amount')
+    )
+
+
+def download_rows(user_id):
+    """Строки файла списка покупок: название, единица измерения,
+    количество.
+    """
+    return (
+        ShoppingListItem.objects
+        .filter(user_id=user_id)
+        .values_list(
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            'total_amount'
+        )
+        .order_by('ingredient__name')
+    )
+
+
+@transaction.atomic
+def apply_deltas(user_ids, deltas):
+    """Прибавление deltas (ингредиент -> изменение) к спискам
+    покупок пользователей user_ids.
+    """
+    deltas = {
+        ingredient: delta for ingredient, delta in deltas.items() if delta
+    }
+    if not user_ids or not deltas:
+        return
+    ShoppingListItem.objects.bulk_create(
+        [ShoppingListItem(user_id=user_id, ingredient_id=ingredient)
+         for user_id in user_ids
+         for ingredient, delta in deltas.items() if delta > 0],
+        ignore_conflicts=True
+    )
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=deltas
+    )
+    items.update(total_amount=F('total_amount') + Case(
+        *[When(ingredient_id=ingredient, then=Value(delta))
+          for ingredient, delta in deltas.items()],
+        output_field=IntegerField()
+    ))
+    items.filter(total_amount__lte=0).delete()
+
+
+def add_recipe(user_id, recipe_id):
+    """Рецепт добавлен в корзину пользователя."""
+    apply_deltas([user_id], recipe_amounts(recipe_id))
+
+
+def remove_recipe(user_id, recipe_id):
+    """Рецепт удалён из корзины пользователя."""
+    apply_deltas([user_id], {
+        ingredient: -amount
+        for ingredient, amount in recipe_amounts(recipe_id).items()
+    })
+
+
+def change_recipe(recipe_id, old_amounts, new_amounts):
+    """Состав рецепта изменился: пересчёт списков покупок всех,
+    у кого рецепт в корзине.
+    """
+    deltas = defaultdict(int)
+    for ingredient, amount in new_amounts.items():
+        deltas[ingredient] += amount
+    for ingredient, amount in old_amounts.items():
+        deltas[ingredient] -= amount
+    user_ids = list(
+        ShoppingCart.objects
+        .filter(recipe_id=recipe_id)
+        .values_list('user_id', flat=True)
+    )
+    apply_deltas(user_ids, deltas)
+
+
+@transaction.atomic
+def rebuild(user_id):
+    """Пересборка списка покупок пользователя по корзине."""
+    ShoppingListItem.objects.filter(user_id=user_id).delete()
+    ShoppingListItem.objects.bulk_create(
+        ShoppingListItem(
+            user_id=user_id, ingredient_id=ingredient, total_amount=total
+        )
+        for ingredient, total in live_totals(user_id).items() if total > 0
+    )
@@ -0,0 +1,175 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from users.models import CustomUser
+
+from . import shopping_list
+from .cache import bump_version, invalidate_recipes
+from .counters import shift
+from .models import (AmountIngredient, FavoriteRecipe, Ingredient, Recipe,
+                     ShoppingCart, Subscribe, Tag)
+from .search import (ingredient_index, search_update_deferred,
+                     update_search_vector)
+from .tags import TAGS_VERSION
+
+AUTHOR_FIELDS = frozenset(('username', 'email', 'first_name', 'last_name'))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_index(**kwargs):
+    """Новая версия индекса ингредиентов для всех процессов."""
+    ingredient_index.invalidate()
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_recipes_search(instance, created, **kwargs):
+    """Переименованный ингредиент попадает в поиск по его рецептам."""
+    if not created:
+        update_search_vector(amounts__ingredients=instance)
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search(instance, **kwargs):
+    if not search_update_deferred.get():
+        update_search_vector(pk=instance.pk)
+
+
+@receiver(post_save, sender=AmountIngredient)
+@receiver(post_delete, sender=AmountIngredient)
+def update_amount_recipe_search(instance, **kwargs):
+    """Изменение состава рецепта, например, из админки."""
+    if not search_update_deferred.get():
+        update_search_vector(pk=instance.recipe_id)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe_responses(instance, **kwargs):
+    invalidate_recipes([instance.pk])
+
+
+@receiver(post_save, sender=AmountIngredient)
+@receiver(post_delete, sender=AmountIngredient)
+def invalidate_amount_recipe_responses(instance, **kwargs):
+    invalidate_recipes([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_tagged_recipe_responses(instance, action, reverse, pk_set,
+                                       **kwargs):
+    """Теги рецепта изменены с любой стороны связи.
+
+    Со стороны рецепта updated_at обновит его save(), со стороны тега
+    рецепты отмечаются здесь.
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_recipes([instance.pk])
+        return
+    if action in ('post_add', 'post_remove'):
+        recipe_ids = pk_set
+    elif action == 'pre_clear':
+        recipe_ids = list(instance.recipes.values_list('id', flat=True))
+    else:
+        return
+    Recipe.objects.filter(pk__in=recipe_ids).touch()
+    invalidate_recipes(recipe_ids)
+
+
+@receiver(post_save, sender=Ingredient)
+def invalidate_ingredient_recipe_responses(instance, created, **kwargs):
+    """Переименованный ингредиент показывается во всех его рецептах."""
+    if not created:
+        recipe_ids = list(
+            Recipe.objects
+            .filter(amounts__ingredients=instance)
+            .values_list('id', flat=True)
+        )
+        Recipe.objects.filter(pk__in=recipe_ids).touch()
+        invalidate_recipes(recipe_ids)
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_author_recipe_responses(instance, created, update_fields,
+                                       **kwargs):
+    """Данные автора встроены в его рецепты.
+
+    Например, сохранение last_login при входе рецепты не затрагивает.
+    """
+    if created or update_fields and not AUTHOR_FIELDS & update_fields:
+        return
+    invalidate_recipes(instance.recipes.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_registry(**kwargs):
+    """Новая версия справочника тегов для всех процессов."""
+    bump_version(TAGS_VERSION)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def touch_tagged_recipes(instance, created=False, **kwargs):
+    """Тег встроен в рецепты: изменение тега меняет и их.
+
+    pre_delete, а не post_delete: после удаления связей уже нет.
+    """
+    if not created:
+        recipe_ids = list(
+            Recipe.objects.filter(tags=instance).values_list('id', flat=True)
+        )
+        Recipe.objects.filter(pk__in=recipe_ids).touch()
+        invalidate_recipes(recipe_ids)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(instance, created, **kwargs):
+    """Рецепт в корзине: прибавляем его ингредиенты к списку покупок."""
+    if created:
+        shopping_list.add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(instance, **kwargs):
+    """Рецепт убран из корзины: вычитаем его ингредиенты.
+
+    pre_delete, а не post_delete: при каскадном удалении рецепта его
+    AmountIngredient ещё на месте.
+    """
+    shopping_list.remove_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_save, sender=FavoriteRecipe)
+def increase_favorites_count(instance, created, **kwargs):
+    if created:
+        shift(Recipe, instance.recipe_id, 'favorites_count', 1)
+
+
+@receiver(post_delete, sender=FavoriteRecipe)
+def decrease_favorites_count(instance, **kwargs):
+    shift(Recipe, instance.recipe_id, 'favorites_count', -1)
+
+
+@receiver(post_save, sender=Recipe)
+def increase_recipes_count(instance, created, **kwargs):
+    if created:
+        shift(CustomUser, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrease_recipes_count(instance, **kwargs):
+    shift(CustomUser, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Subscribe)
+def increase_subscribers_count(instance, created, **kwargs):
+    if created:
+        shift(CustomUser, instance.author_id, 'subscribers_count', 1)
+
+
+@receiver(post_delete, sender=Subscribe)
+def decrease_subscribers_count(instance, **kwargs):
+    shift(CustomUser, instance.author_id, 'subscribers_count', -1)
@@ -0,0 +1,51 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, в котором имя файла — хеш его содержимого.
+
+    Одинаковые файлы хранятся один раз и повторно не записываются,
+    а содержимое файла по одному адресу никогда не меняется.
+    Неиспользуемые файлы удаляет команда collect_images.
+    """
+
+    def touch(self, name):
+        """Обновление времени изменения файла.
+
+        collect_images не трогает свежие файлы, поэтому повторно
+        загруженный файл не удалится, пока на него не сослались.
+        """
+        os.utime(self.path(name))
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            self.touch(name)
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    @staticmethod
+    def hashed_name(name, content):
+        """recipes/x.jpg -> recipes/ab/abcdef....jpg"""
+        sha256 = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        content.seek(0)
+        digest = sha256.hexdigest()
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, digest[:2], digest + extension)
+
+
+content_storage = ContentAddressedStorage()
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import threading
+
+from .cache import get_version
+from .models import Tag
+
+TAGS_VERSION = 'tags'
+
+
+class TagSnapshot:
+    """Неизменяемый снимок справочника тегов."""
+
+    def __init__(self, version, tags):
+        self.version = version
+        self.by_id = {tag.id: tag for tag in tags}
+        self.by_slug = {tag.slug: tag for tag in tags}
+        self.data = [
+            {'id': tag.id, 'name': tag.name,
+             'color': tag.color, 'slug': tag.slug}
+            for tag in tags
+        ]
+        self.data_by_id = {item['id']: item for item in self.data}
+        self.position = {tag.id: number for number, tag in enumerate(tags)}
+        self.content = json.dumps(
+            self.data, ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8')
+        self.etag = f'"{hashlib.md5(self.content).hexdigest()}"'
+
+
+class TagRegistry:
+    """Справочник тегов в памяти процесса.
+
+    Перечитывается из базы, когда меняется версия TAGS_VERSION в общем
+    кэше; версию увеличивают сигналы сохранения и удаления Tag.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def get(self):
+        version = get_version(TAGS_VERSION)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = TagSnapshot(version, list(Tag.objects.all()))
+                self._snapshot = snapshot
+            return snapshot
+
+    def ids_for_slugs(self, slugs):
+        by_slug = self.get().by_slug
+        return [by_slug[slug].id for slug in slugs if slug in by_slug]
+
+
+tag_registry = TagRegistry()
+
+
+def tag_choices():
+    """Варианты для фильтра по слагу тега."""
+    by_slug = tag_registry.get().by_slug
+    return [(slug, tag.name) for slug, tag in by_slug.items()]
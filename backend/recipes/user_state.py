@@ -0,0 +1,88 @@
+from django.db.models import Count, Max
+
+from .models import FavoriteRecipe, ShoppingCart, Subscribe
+
+
+class UserState:
+    """Избранное, корзина и подписки текущего пользователя.
+
+    Флаги загружаются пачкой для всех рецептов и авторов страницы
+    и дальше проверяются в памяти; для объекта вне загруженной
+    пачки выполняется отдельный запрос.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.favorites = set()
+        self.cart = set()
+        self.subscriptions = set()
+        self.loaded_recipes = set()
+        self.loaded_authors = set()
+
+    def load_recipes(self, recipe_ids):
+        recipe_ids = set(recipe_ids) - self.loaded_recipes
+        if not recipe_ids or self.user.is_anonymous:
+            return
+        self.favorites.update(
+            FavoriteRecipe.objects
+            .filter(user=self.user, recipe_id__in=recipe_ids)
+            .order_by()
+            .values_list('recipe_id', flat=True)
+        )
+        self.cart.update(
+            ShoppingCart.objects
+            .filter(user=self.user, recipe_id__in=recipe_ids)
+            .order_by()
+            .values_list('recipe_id', flat=True)
+        )
+        self.loaded_recipes |= recipe_ids
+
+    def load_authors(self, author_ids):
+        author_ids = set(author_ids) - self.loaded_authors
+        if not author_ids or self.user.is_anonymous:
+            return
+        self.subscriptions.update(
+            Subscribe.objects
+            .filter(user=self.user, author_id__in=author_ids)
+            .order_by()
+            .values_list('author_id', flat=True)
+        )
+        self.loaded_authors |= author_ids
+
+    def fingerprint(self):
+        """Строка, которая меняется при любом изменении избранного,
+        корзины или подписок пользователя.
+
+        Строки этих таблиц только добавляются и удаляются, а id растут,
+        поэтому достаточно количества и наибольшего id.
+        """
+        if self.user.is_anonymous:
+            return ''
+        parts = []
+        for model in (FavoriteRecipe, ShoppingCart, Subscribe):
+            stats = model.objects.filter(user=self.user).aggregate(
+                count=Count('id'), last=Max('id')
+            )
+            parts.append(f'{stats["count"]}-{stats["last"]}')
+        return ':'.join(parts)
+
+    def is_favorited(self, recipe_id):
+        self.load_recipes([recipe_id])
+        return recipe_id in self.favorites
+
+    def is_in_shopping_cart(self, recipe_id):
+        self.load_recipes([recipe_id])
+        return recipe_id in self.cart
+
+    def is_subscribed(self, author_id):
+        self.load_authors([author_id])
+        return author_id in self.subscriptions
+
+
+def user_state(request):
+    """Состояние пользователя, общее для всех сериализаторов запроса."""
+    state = getattr(request, '_user_state', None)
+    if state is None or state.user != request.user:
+        state = UserState(request.user)
+        request._user_state = state
+    return state
@@ -7,4 +7,5 @@ from .models import CustomUser
 class UserAdmin(admin.ModelAdmin):
     list_filter = ('email', 'first_name')
     list_display = ('id', 'username', 'email', 'first_name',
-                    'last_name', 'is_staff')
+                    'last_name', 'is_staff', 'recipes_count',
+                    'subscribers_count')
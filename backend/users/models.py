@@ -36,6 +36,20 @@ class CustomUser(AbstractUser):
         max_length=150,
         help_text='Придумайте пароль'
     )
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов',
+        default=0,
+        editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+        editable=False
+    )
+    updated_at = models.DateTimeField(
+        'Изменён',
+        auto_now=True
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name', ]
@@ -1,14 +1,29 @@
 from django.contrib.auth import get_user_model
+from django.db import models
 from djoser.serializers import UserCreateSerializer
 from rest_framework import serializers
 
-from recipes.models import Subscribe
+from recipes.user_state import user_state
 
 from .models import CustomUser
 
 User = get_user_model()
 
 
+class UserListSerializer(serializers.ListSerializer):
+    """Список пользователей: подписки загружаются для всей страницы."""
+
+    def to_representation(self, data):
+        request = self.context.get('request')
+        if request is not None:
+            users = list(
+                data.all() if isinstance(data, models.Manager) else data
+            )
+            user_state(request).load_authors(user.id for user in users)
+            data = users
+        return super().to_representation(data)
+
+
 class UserSerializer(serializers.ModelSerializer):
     """Сериализатор для модели пользователя."""
     is_subscribed = serializers.SerializerMethodField()
@@ -20,14 +35,16 @@ class UserSerializer(serializers.ModelSerializer):
                   'last_name', 'is_subscribed', 'password')
         extra_kwargs = {'password': {'write_only': True}}
         read_only_fields = 'is_subscribed',
+        list_serializer_class = UserListSerializer
 
     def get_is_subscribed(self, obj):
         """Проверка подписки пользователей."""
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
-        return Subscribe.objects.filter(user=request.user,
-                                        author=obj).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return user_state(request).is_subscribed(obj.id)
 
     def create(self, validated_data: dict) -> User:
         """Создаёт нового пользователя с запрошенными полями."""
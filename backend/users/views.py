@@ -1,4 +1,7 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
+from django.db.models import BooleanField, OuterRef, Subquery, Value
 from djoser.serializers import SetPasswordSerializer
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
@@ -6,8 +9,11 @@ from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from api.conditional import make_etag, not_modified, set_validators
+from api.feed import FAVORITE_FIELDS
 from api.serializers import SubscribeSerializer
-from recipes.models import Subscribe
+from recipes.models import Recipe, Subscribe
+from recipes.user_state import user_state
 
 from .permissions import CurrentUserOrAdmin, GetPost
 from .serializers import UserSerializer
@@ -20,6 +26,32 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [GetPost]
 
+    def retrieve(self, request, *args, **kwargs):
+        """Пользователь с ETag и Last-Modified от его updated_at."""
+        try:
+            updated_at = (
+                User.objects
+                .filter(pk=kwargs['pk'])
+                .values_list('updated_at', flat=True)
+                .first()
+            )
+        except (TypeError, ValueError):
+            updated_at = None
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+        modified = updated_at.timestamp()
+        etag = make_etag(
+            modified, user_state(request).is_subscribed(int(kwargs['pk']))
+        )
+        last_modified = modified if request.user.is_anonymous else None
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        return set_validators(response, etag, last_modified)
+
     @action(
         detail=False,
         methods=['get'],
@@ -49,20 +81,40 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=[IsAuthenticated]
     )
     def subscriptions(self, request):
+        """Подписки пользователя.
+
+        Первые recipes_limit рецептов всех авторов страницы загружаются
+        одним запросом values(): коррелированный подзапрос с LIMIT
+        на автора.
+        """
+        recipes = Recipe.objects.all()
+        limit = request.query_params.get('recipes_limit')
+        if limit:
+            recipes = recipes.filter(pk__in=Subquery(
+                Recipe.objects
+                .filter(author=OuterRef('author'))
+                .values('pk')[:int(limit)]
+            ))
         queryset = (
             User.objects
             .filter(subscriber__user=request.user)
+            .annotate(is_subscribed=Value(True, output_field=BooleanField()))
             .order_by('id')
         )
         page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = SubscribeSerializer(
-                page, many=True, context={'request': request}
-            )
-            return self.get_paginated_response(serializer.data)
+        authors = list(queryset if page is None else page)
+        previews = defaultdict(list)
+        for row in recipes.filter(author__in=authors).values(
+            'author_id', *FAVORITE_FIELDS
+        ):
+            previews[row['author_id']].append(row)
+        for author in authors:
+            author.recipes_preview = previews[author.id]
         serializer = SubscribeSerializer(
-            queryset, many=True, context={'request': request}
+            authors, many=True, context={'request': request}
         )
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(